@@ -1,10 +1,73 @@
+import io
+import time
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-from simulation import simulate_strategy, simulate_multiple_runs, optimize_investment_split
+from cache import cached_simulate_strategy, cached_compare_strategies, cached_pareto_frontier, default_cache
+from charts import band_figure, histogram_figure, line_figure
+import instrumentation
+from instrumentation import span
+from paths import LognormalMarket, RegimeSwitchingMarket
+from incremental import IncrementalSimulator
+from pareto import DEFAULT_JOB_LOSS_STARTS, non_dominated_sort
+from result_store import ResultStore
+from jobs import default_jobs, submit_monte_carlo, submit_optimization
 
 st.set_page_config(page_title="Investment vs Loan Repayment", layout="wide")
 
+instrumentation.set_enabled(st.session_state.get("diagnostics_enabled", False))
+last_action = None
+
+def begin_action(name):
+    instrumentation.reset()
+    return name
+
+# Monte Carlo and optimization run as background jobs shared by all sessions;
+# the page reruns itself while one of this session's jobs is in progress
+polling = False
+
+def start_job(session_key, submit, *args, **kwargs):
+    # Submit before releasing the previous job: resubmitting the same settings
+    # attaches to it again, and the release then only drops the extra
+    # subscription instead of cancelling it
+    previous = st.session_state.get(session_key)
+    st.session_state[session_key] = submit(*args, **kwargs)
+    if previous is not None and not previous.done:
+        default_jobs.release(previous)
+
+# Jobs whose worker timings are shown once this run reaches the Diagnostics panel
+finished_jobs = []
+
+def report_job_diagnostics(session_key, job, label):
+    if job.diagnostics is not None and st.session_state.get(f"{session_key}_reported") is not job:
+        st.session_state[f"{session_key}_reported"] = job
+        finished_jobs.append((label, job.diagnostics))
+
+def track_job(session_key, label):
+    # Progress bar and cancel button for the session's job; returns
+    # (result or latest partial result, still running)
+    job = st.session_state.get(session_key)
+    if job is None:
+        return None, False
+    if job.done:
+        report_job_diagnostics(session_key, job, label)
+    if job.status == "done":
+        return job.result, False
+    if job.status == "failed":
+        st.error(f"{label} failed: {job.error}")
+        return None, False
+    if job.status == "cancelled":
+        st.warning(f"{label} cancelled.")
+        return None, False
+    st.progress(job.progress, text=f"{label}: {job.progress:.0%} ({job.elapsed:.0f}s)")
+    if st.button("Cancel", key=f"cancel_{session_key}"):
+        default_jobs.release(st.session_state.pop(session_key))
+        st.warning(f"{label} cancelled.")
+        return None, False
+    return job.partial, True
+
 # Sidebar Navigation
 st.sidebar.header("Navigation")
 tabs = st.sidebar.radio("Go to:", [
@@ -13,6 +76,8 @@ tabs = st.sidebar.radio("Go to:", [
     "📈 Strategy Comparison", 
     "📊 Monte Carlo", 
     "🔍 Optimization Explorer", 
+    "🏅 Pareto",
+    "🌪️ Sensitivity",
     "ℹ️ About"
 ])
 
@@ -43,6 +108,7 @@ fx = st.sidebar.number_input("USD to INR Conversion Rate", min_value=0.0, value=
 st.sidebar.subheader("Strategy Settings")
 invest_pct = st.sidebar.slider("Investment % of Savings", 0, 100, 50)
 threshold_pct = st.sidebar.slider("Loan Repayment Threshold % (Strategy E)", 0, 100, 50)
+moratorium_invest_pct = st.sidebar.slider("Investment % During Moratorium (Strategies C & D)", 0, 100, 100)
 risk_type = st.sidebar.selectbox("Risk Driver (Strategy F)", ["Job Security", "Investment Volatility"])
 
 st.sidebar.subheader("🧪 Scenario Engine")
@@ -58,6 +124,9 @@ inflation_rate = st.sidebar.slider("Annual Inflation Rate (%)", 0, 20, 6) / 100
 enable_fx_drift = st.sidebar.checkbox("🌍 Simulate Currency Drift (USD→INR)", value=False)
 fx_drift_rate = st.sidebar.slider("Annual USD→INR Drift Rate (%)", -10, 10, -3) / 100 if enable_fx_drift else 0
 
+cache_stats = default_cache.stats()
+st.sidebar.caption(f"🗄️ Result cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · "
+                   f"{cache_stats['evictions']} evictions · {cache_stats['bytes'] / 2**20:.1f} MB")
 
 params = {
     'years': years,
@@ -75,6 +144,7 @@ params = {
     'usd_to_inr_rate': fx,
     'percent_to_invest': invest_pct,
     'threshold_pct': threshold_pct,
+    'moratorium_invest_pct': moratorium_invest_pct,
     'risk_type': risk_type,
     'enable_job_loss': enable_job_loss,
     'job_loss_start': job_loss_start,
@@ -118,6 +188,7 @@ Use the navigation sidebar to begin your simulation.
 - **🔸 Strategy D – Invest First, Then Aggressive:** Invest during moratorium, then repay loan aggressively.
 - **🟢 Strategy E – Dynamic Allocation:** Repay until X% loan cleared, then invest fully.
 - **🟠 Strategy F – Risk-Aware:** Allocation varies monthly based on job security or investment volatility.
+- **🟣 Strategy H – Glide Path:** Invested share ramps up month by month to your investment % by the final month.
         """)
 
     st.subheader("🧪 Scenario Engine")
@@ -145,18 +216,29 @@ elif tabs == "🏃‍♂️ Run Simulation":
         "D - Invest First, Then Aggressive",
         "E - Dynamic Allocation",
         "F - Risk-Aware Allocation",
-        "G - Random Split Simulation"
+        "G - Random Split Simulation",
+        "H - Glide Path"
     ])
     strategy_code = strategy[0]
     params['strategy'] = strategy_code
 
     if st.button("Run Simulation"):
-        df, summary = simulate_strategy(params)
+        last_action = begin_action("Run Simulation")
+        # Per session: re-runs after a sidebar tweak resume from the last
+        # checkpoint before the first month the tweak affects
+        simulator = st.session_state.setdefault("simulator", IncrementalSimulator())
+        resumed_before = simulator.months_reused
+        with span("app.run_simulation.compute"):
+            result = cached_simulate_strategy(params, simulate=simulator.run)
+            df, summary = result
         st.success("Simulation complete.")
+        if simulator.months_reused > resumed_before:
+            st.caption(f"♻️ Reused the first {simulator.last_resume_month} months of the previous run.")
 
         st.subheader("📈 Net Worth, Loan & Investment Over Time")
-        fig = px.line(df, x=df.index, y=["Net Worth", "Loan Balance", "Investment Balance"])
-        st.plotly_chart(fig, use_container_width=True)
+        with span("app.run_simulation.chart"):
+            fig = line_figure(df, ["Net Worth", "Loan Balance", "Investment Balance"])
+            st.plotly_chart(fig, use_container_width=True)
 
         st.subheader("📋 Final Summary")
         summary_df = pd.DataFrame(summary, index=["Value"]).T
@@ -170,21 +252,29 @@ elif tabs == "🏃‍♂️ Run Simulation":
 
 
         st.subheader("📄 Detailed Monthly Table")
-        st.dataframe(df)
-        st.download_button("Download Results", data=df.to_csv().encode(), file_name="simulation_output.csv")
+        with span("app.run_simulation.table"):
+            st.dataframe(df)
+        with span("app.run_simulation.export"):
+            store = ResultStore.from_result(result)
+            col1, col2 = st.columns(2)
+            col1.download_button("Download Results (CSV)", data=store.to_csv(io.BytesIO()),
+                                 file_name="simulation_output.csv")
+            col2.download_button("Download Results (Parquet)", data=store.to_parquet(io.BytesIO()),
+                                 file_name="simulation_output.parquet")
 # -------------------- STRATEGY COMPARISION --------------------
 elif tabs == "📈 Strategy Comparison":
     st.header("📊 Strategy Comparison")
 
     selected_strategies = st.multiselect(
         "Select Strategies to Compare",
-        options=["A", "B", "C", "D", "E", "F"],
+        options=["A", "B", "C", "D", "E", "F", "H"],
         default=["A", "B", "C"]
     )
 
     if st.button("Compare Strategies"):
-        from simulation import compare_strategies
-        df_compare = compare_strategies(params, selected_strategies)
+        last_action = begin_action("Compare Strategies")
+        with span("app.compare.compute"):
+            df_compare = cached_compare_strategies(params, selected_strategies)
 
         if df_compare.empty:
             st.warning("⚠️ No results could be generated. Please review your inputs or try fewer strategies.")
@@ -207,35 +297,37 @@ elif tabs == "📈 Strategy Comparison":
             st.subheader("🧠 Smart Recommendation")
 
             try:
-                df_numeric = df_compare.copy()
-                df_numeric["Final Net Worth"] = pd.to_numeric(df_numeric["Final Net Worth"], errors="coerce")
-                df_numeric["Final Investment Balance"] = pd.to_numeric(df_numeric["Final Investment Balance"], errors="coerce")
+                # Months to clear as numbers, NaN where the loan is never cleared
+                months = df_compare["Loan Cleared In (Months)"].where(
+                    df_compare["Loan Cleared In (Months)"] != "Not Cleared").astype(float)
 
                 # Best Net Worth Strategy
-                best_net_worth_row = df_numeric.loc[df_numeric["Final Net Worth"].idxmax()]
+                best_net_worth_row = df_compare.loc[df_compare["Final Net Worth"].idxmax()]
                 strategy_net = best_net_worth_row["Strategy"]
                 net_value = best_net_worth_row["Final Net Worth"]
 
                 # Fastest Loan Clearance Strategy
-                loan_filtered = df_numeric[df_numeric["Loan Cleared In (Months)"] != "Not Cleared"]
-                if not loan_filtered.empty:
-                    loan_filtered["Loan Cleared In (Months)"] = pd.to_numeric(loan_filtered["Loan Cleared In (Months)"], errors="coerce")
-                    fastest_loan_row = loan_filtered.loc[loan_filtered["Loan Cleared In (Months)"].idxmin()]
-                    strategy_loan = fastest_loan_row["Strategy"]
-                    loan_months = fastest_loan_row["Loan Cleared In (Months)"]
+                if months.notna().any():
+                    strategy_loan = df_compare.loc[months.idxmin(), "Strategy"]
+                    loan_months = int(months.min())
                 else:
                     strategy_loan = "N/A"
                     loan_months = "No strategy cleared the loan"
 
+                # Strategies no other strategy beats on both counts
+                ranks = non_dominated_sort(np.column_stack([df_compare["Final Net Worth"], months.fillna(np.inf)]),
+                                           maximize=[True, False])
+                balanced = ", ".join(df_compare["Strategy"][ranks == 0])
+
                 st.markdown(f"""
 - 🥇 **Highest Net Worth**: Strategy **{strategy_net}** with ₹{net_value:,.0f}  
 - ⏱️ **Fastest Loan Payoff**: Strategy **{strategy_loan}** in **{loan_months} months**
+- ⚖️ **Best Trade-offs**: Strategies **{balanced}** (see 🏅 Pareto for every allocation setting)
                 """)
 
             except Exception as e:
                 st.error(f"Smart recommendation failed: {e}")
 
-
 # -------------------- STRATEGY G – MONTE CARLO --------------------
 elif tabs == "📊 Monte Carlo":
     st.header("🎲 Monte Carlo Simulation")
@@ -243,31 +335,67 @@ elif tabs == "📊 Monte Carlo":
 Run Strategy G multiple times with randomized savings allocation to analyze the range of possible financial outcomes.
 """)
 
-    num_runs = st.slider("Number of Simulations", min_value=10, max_value=500, value=100, step=10)
+    num_runs = st.select_slider("Number of Simulations", options=[100, 500, 1_000, 10_000, 100_000, 1_000_000, 10_000_000], value=1_000)
+    seed = st.number_input("Random Seed", min_value=0, value=42, step=1)
+    target_error = st.number_input("Stop Early at Relative Std. Error (%)", min_value=0.0, value=0.0, step=0.01,
+                                   help="0 runs every simulation.") / 100
+    market_choice = st.radio("Market Returns & FX", ["Fixed", "Lognormal", "Regime Switching"], horizontal=True,
+                             help="Random monthly investment returns and USD→INR moves on top of the random splits.")
+    market = None
+    if market_choice != "Fixed":
+        col1, col2, col3 = st.columns(3)
+        fx_vol = col2.slider("FX Volatility (annual %)", 0.0, 30.0, 5.0, 0.5) / 100
+        correlation = col3.slider("Return / FX Correlation", -1.0, 1.0, 0.0, 0.05)
+        if market_choice == "Lognormal":
+            return_vol = col1.slider("Return Volatility (annual %)", 0.0, 60.0, 15.0, 0.5) / 100
+            market = LognormalMarket(return_vol, fx_vol, correlation)
+        else:
+            bear_chance = col1.slider("Monthly Chance of a Bear Market (%)", 0.0, 20.0, 3.0, 0.5) / 100
+            market = RegimeSwitchingMarket(transition=((1 - bear_chance, bear_chance), (0.15, 0.85)),
+                                           fx_vol=fx_vol, correlation=correlation)
+    show_fan = st.checkbox("Show Net Worth Fan Chart", value=True,
+                           help="Monthly P5–P95 bands; keeps a small histogram per month instead of every path.")
     params["strategy"] = "G"
 
     if st.button("Run Monte Carlo Simulation"):
-        with st.spinner("Running simulations..."):
-            df_runs = simulate_multiple_runs(params, runs=num_runs)
-
-            st.success("Simulation complete!")
-
-            st.subheader("📊 Net Worth Distribution")
-            fig = px.histogram(df_runs, x='Final Net Worth (INR)', nbins=30)
+        last_action = begin_action("Monte Carlo")
+        with span("app.monte_carlo.submit"):
+            start_job("mc_job", submit_monte_carlo, params, runs=num_runs, seed=int(seed), rtol=target_error or None,
+                      market=market, fan_chart=show_fan)
+
+    mc, running = track_job("mc_job", "Monte Carlo")
+    polling = polling or running
+    if mc is not None:
+        if running:
+            st.info(f"Partial results: {mc.runs:,} of {num_runs:,} runs so far.")
+        else:
+            st.success(f"Simulation complete! {mc.runs:,} runs" + (" (converged early)" if mc.converged else ""))
+
+        if mc.fan is not None:
+            st.subheader("🌈 Net Worth Fan Chart")
+            with span("app.monte_carlo.fan_chart"):
+                fig = band_figure(mc.fan.bands(), y_title="Net Worth (INR)")
+                st.plotly_chart(fig, use_container_width=True)
+
+        st.subheader("📊 Net Worth Distribution")
+        with span("app.monte_carlo.chart"):
+            edges, counts = mc.display_histogram(bins=30)
+            fig = histogram_figure(edges, counts, x_title="Final Net Worth (INR)")
             st.plotly_chart(fig, use_container_width=True)
 
-            st.subheader("📋 Summary Statistics")
-            desc = df_runs['Final Net Worth (INR)'].describe()
-            desc_formatted = desc.copy()
-            desc_formatted = desc_formatted.apply(lambda x: f"₹{x:,.2f}" if isinstance(x, float) else x)
-            desc_formatted['count'] = f"{int(desc['count'])}"
-            st.write(desc_formatted)
+        st.subheader("📋 Summary Statistics")
+        with span("app.monte_carlo.describe"):
+            desc = mc.describe()
+        desc_formatted = desc.copy()
+        desc_formatted = desc_formatted.apply(lambda x: f"₹{x:,.2f}" if isinstance(x, float) else x)
+        desc_formatted['count'] = f"{int(desc['count'])}"
+        st.write(desc_formatted)
 
-            st.subheader("🧠 Interpretation")
-            st.markdown(f"""
-After running {num_runs} randomized simulations of Strategy G:
+        st.subheader("🧠 Interpretation")
+        st.markdown(f"""
+After running {mc.runs:,} randomized simulations of Strategy G (seed {seed}):
 
-- 💰 **Average Net Worth:** ₹{desc['mean']:,.0f}
+- 💰 **Average Net Worth:** ₹{desc['mean']:,.0f} (± ₹{desc['std_error']:,.0f} standard error)
 - 📉 **Min:** ₹{desc['min']:,.0f}, 📈 **Max:** ₹{desc['max']:,.0f}
 - 📊 Most users land between ₹{desc['25%']:,.0f} and ₹{desc['75%']:,.0f}
 
@@ -282,26 +410,162 @@ This tool helps you find the **optimal savings split** between loan repayment an
 """)
 
     strategy_opt = st.selectbox("Select a Strategy to Optimize", ["B - Balanced", "C - Invest First, Then Balanced"])
-    granularity = st.slider("Search Step Size (in %)", min_value=1, max_value=25, value=5)
+    search_method = st.radio("Search Method", ["Golden-Section Search", "Full Grid"], horizontal=True)
+    granularity = st.slider("Search Step Size (in %)", min_value=1, max_value=25, value=10 if search_method == "Golden-Section Search" else 5,
+                            help="For golden-section search this is the coarse bracketing grid; the optimum is then refined to 0.1%.")
     params["strategy"] = strategy_opt[0]
 
     if st.button("Run Optimization"):
-        with st.spinner("Running simulations..."):
-            df_opt = optimize_investment_split(params, step=granularity)
-
-            st.success("Optimization complete!")
+        last_action = begin_action("Optimization")
+        with span("app.optimization.submit"):
+            start_job("optimization_job", submit_optimization, params, step=granularity,
+                      method="golden" if search_method == "Golden-Section Search" else "grid")
+
+    df_opt, running = track_job("optimization_job", "Optimization")
+    polling = polling or running
+    if df_opt is not None and len(df_opt):
+        if running:
+            st.info(f"{len(df_opt)} simulations evaluated so far...")
+        else:
+            st.success(f"Optimization complete! {len(df_opt)} simulations evaluated.")
 
-            st.subheader("📈 Final Net Worth vs. Investment %")
-            fig = px.line(df_opt, x="Investment %", y="Final Net Worth", markers=True)
+        st.subheader("📈 Final Net Worth vs. Investment %")
+        with span("app.optimization.chart"):
+            fig = line_figure(df_opt.sort_values("Investment %"), ["Final Net Worth"], x="Investment %", markers=True,
+                              y_title="Final Net Worth")
             st.plotly_chart(fig, use_container_width=True)
 
-            best_row = df_opt.loc[df_opt["Final Net Worth"].idxmax()]
-            st.subheader("🏆 Best Allocation Recommendation")
-            st.markdown(f"""
-- 💸 **Optimal Investment %:** {int(best_row['Investment %'])}%
+        best_row = df_opt.loc[df_opt["Final Net Worth"].idxmax()]
+        st.subheader("🏆 Best Allocation Recommendation" if not running else "🏆 Best Allocation So Far")
+        st.markdown(f"""
+- 💸 **Optimal Investment %:** {best_row['Investment %']:.1f}%
 - 💰 **Final Net Worth:** ₹{best_row['Final Net Worth']:,.0f}
 """)
 
+    st.subheader("🎛️ Multi-Parameter Search")
+    st.markdown("Tune every allocation knob a strategy uses at once: investment %, moratorium investment % and the Strategy E threshold.")
+    strategy_multi = st.selectbox("Strategy", ["B", "C", "D", "E", "H"], index=1)
+
+    if st.button("Run Multi-Parameter Search"):
+        with st.spinner("Searching..."):
+            from optimizer import optimize_parameters, KNOB_LABELS
+            last_action = begin_action("Multi-Parameter Search")
+            with span("app.optimization.multi_parameter"):
+                best = optimize_parameters(dict(params, strategy=strategy_multi))
+
+            st.success(f"Search complete! {best['evaluations']} simulations evaluated, {best['cache_hits']} repeated points reused.")
+            st.markdown("\n".join(f"- **{KNOB_LABELS[name]}:** {value:.1f}%" for name, value in best["best"].items())
+                        + f"\n- 💰 **Final Net Worth:** ₹{best['final_net_worth']:,.0f}")
+            st.dataframe(best["trace"])
+
+# -------------------- PARETO EXPLORER --------------------
+elif tabs == "🏅 Pareto":
+    st.header("🏅 Pareto Explorer")
+    st.markdown("""
+Every strategy (except the random Strategy G) is run at every setting of the allocation knobs it uses, on a grid.
+A configuration is on the **frontier** (rank 0) when no other configuration is at least as good on every objective and better on one:
+higher final net worth, faster loan payoff and, optionally, a higher worst-case net worth when a job loss hits.
+Rank 1 is the frontier once rank 0 is removed, and so on.
+""")
+    col1, col2 = st.columns(2)
+    pareto_step = col1.slider("Grid Step (%)", min_value=1, max_value=25, value=5)
+    worst_case = col2.checkbox("Add Worst-Case Net Worth Under Job Loss", value=False)
+    job_loss_starts = None
+    if worst_case:
+        job_loss_starts = tuple(sorted(col2.multiselect("Job Loss Starting in Month", [6, 12, 18, 24, 36, 48, 60],
+                                                        default=list(DEFAULT_JOB_LOSS_STARTS)))) or None
+
+    with span("app.pareto.compute"):
+        candidates = cached_pareto_frontier(params, step=pareto_step, job_loss_starts=job_loss_starts)
+    frontier = candidates[candidates["Rank"] == 0].sort_values(["Months to Clear", "Final Net Worth"])
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Configurations", f"{len(candidates):,}")
+    col2.metric("On the Frontier", f"{len(frontier):,}")
+    col3.metric("Never Clear the Loan", f"{candidates['Months to Clear'].isna().sum():,}")
+
+    st.subheader("📈 Net Worth vs. Months to Clear")
+    max_rank = st.slider("Show Ranks Up To", min_value=0, max_value=int(candidates["Rank"].max()),
+                         value=min(3, int(candidates["Rank"].max())))
+    with span("app.pareto.chart"):
+        shown = candidates[(candidates["Rank"] <= max_rank) & candidates["Months to Clear"].notna()]
+        fig = px.scatter(shown, x="Months to Clear", y="Final Net Worth", color="Rank", symbol="Strategy",
+                         hover_data=[column for column in candidates.columns if column not in ("Rank",)],
+                         render_mode="webgl", color_continuous_scale="Viridis_r")
+        if job_loss_starts is None:
+            # With two objectives the frontier is a staircase
+            cleared = frontier[frontier["Months to Clear"].notna()]
+            fig.add_scatter(x=cleared["Months to Clear"], y=cleared["Final Net Worth"], mode="lines",
+                            line=dict(color="black", dash="dot", shape="hv"), name="Frontier")
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("🏆 Frontier Configurations")
+    st.dataframe(frontier.drop(columns="Rank"), hide_index=True)
+
+# -------------------- SENSITIVITY --------------------
+elif tabs == "🌪️ Sensitivity":
+    st.header("🌪️ Sensitivity Analysis")
+    st.markdown("""
+Which input matters most? Every numeric input is nudged down and up while everything else stays fixed,
+and the bars show how far each nudge moves the result. Scenario inputs are included when their toggle is on.
+""")
+    from sensitivity import grid_values, sensitivity_analysis, sensitivity_grid
+
+    strategy_sens = st.selectbox("Strategy", [
+        "A - Aggressive Repayment",
+        "B - Balanced",
+        "C - Invest First, Then Balanced",
+        "D - Invest First, Then Aggressive",
+        "E - Dynamic Allocation",
+        "F - Risk-Aware Allocation",
+        "G - Random Split Simulation",
+        "H - Glide Path"
+    ], index=1)
+    delta_pct = st.slider("Perturbation (± %)", 1, 50, 10, help="Whole-month inputs such as years always move by one.")
+    metric = st.radio("Outcome", ["Final Net Worth", "Loan Payoff Month"], horizontal=True)
+    sens_params = dict(params, strategy=strategy_sens[0])
+
+    last_action = begin_action("Sensitivity")
+    with span("app.sensitivity.compute"):
+        base, table = sensitivity_analysis(sens_params, delta=delta_pct / 100)
+
+    if metric == "Final Net Worth":
+        base_value, low_col, high_col, elasticity_col = base['final_net_worth'], "Net Worth (Low)", "Net Worth (High)", "Net Worth Elasticity"
+    else:
+        base_value, low_col, high_col, elasticity_col = base['months_to_clear_loan'], "Payoff Month (Low)", "Payoff Month (High)", "Payoff Elasticity"
+
+    with span("app.sensitivity.chart"):
+        ranked = table.assign(Swing=(table[high_col] - table[low_col]).abs()).sort_values("Swing")
+        tornado = pd.concat([
+            pd.DataFrame({"Parameter": ranked["Parameter"], "Change": ranked[low_col] - base_value, "Move": "Input down"}),
+            pd.DataFrame({"Parameter": ranked["Parameter"], "Change": ranked[high_col] - base_value, "Move": "Input up"}),
+        ])
+        fig = px.bar(tornado, x="Change", y="Parameter", color="Move", orientation="h", barmode="overlay",
+                     labels={"Change": f"Change in {metric}"})
+        fig.update_layout(height=max(400, 28 * len(ranked)))
+        st.plotly_chart(fig, use_container_width=True)
+
+    if pd.isna(base_value):
+        st.info("The loan is not cleared in the base case, so payoff elasticities are undefined.")
+    st.subheader("📋 Elasticities")
+    st.caption("Elasticity = % change in the outcome per 1% change in the input (central difference).")
+    st.dataframe(table[["Parameter", "Base Value", "Low Value", "High Value", low_col, high_col, elasticity_col]], hide_index=True)
+
+    with st.expander("🗺️ Two-Parameter Grid"):
+        names = list(table["Parameter"])
+        if len(names) >= 2:
+            x_key = st.selectbox("X Parameter", names, index=0)
+            y_key = st.selectbox("Y Parameter", names, index=1)
+            spread = st.slider("Range (± %)", 5, 100, 50) / 100
+            if x_key != y_key:
+                with span("app.sensitivity.grid"):
+                    grid = sensitivity_grid(sens_params, x_key, grid_values(x_key, sens_params[x_key], spread),
+                                            y_key, grid_values(y_key, sens_params[y_key], spread),
+                                            metric="final_net_worth" if metric == "Final Net Worth" else "months_to_clear_loan")
+                    fig_grid = px.imshow(grid, aspect="auto", origin="lower", labels={"color": metric},
+                                         x=[f"{v:,.4g}" for v in grid.columns], y=[f"{v:,.4g}" for v in grid.index])
+                    st.plotly_chart(fig_grid, use_container_width=True)
+
 # About
 elif tabs == "ℹ️ About":
     st.header("👤 About the Author")
@@ -317,3 +581,36 @@ When not crunching numbers or designing tools, Vijay is actively involved in men
 📫 [LinkedIn](https://www.linkedin.com/in/vijayathithyan-b-b-ba0b50244/)  
 🔗 [GitHub](https://github.com/Vijayathithyan/Invest_cum_Loan-Repayment)
     """)
+
+# -------------------- DIAGNOSTICS --------------------
+if last_action is not None and instrumentation.is_enabled():
+    st.session_state["diagnostics"] = {"action": last_action, **instrumentation.snapshot()}
+for label, job_diagnostics in finished_jobs:
+    # Worker spans join the submitting action's, or stand alone if the
+    # session has done something else since
+    diagnostics = st.session_state.get("diagnostics")
+    if diagnostics is None or diagnostics["action"] != label:
+        diagnostics = {"action": label, "spans": [], "counters": {}}
+    counters = dict(diagnostics["counters"])
+    for name, n in job_diagnostics["counters"].items():
+        counters[name] = counters.get(name, 0) + n
+    st.session_state["diagnostics"] = {"action": label, "spans": diagnostics["spans"] + job_diagnostics["spans"],
+                                       "counters": dict(sorted(counters.items()))}
+
+with st.sidebar.expander("🩺 Diagnostics"):
+    st.checkbox("Collect timings for the next action", key="diagnostics_enabled")
+    diagnostics = st.session_state.get("diagnostics")
+    if diagnostics:
+        st.caption(f"Last action: {diagnostics['action']}")
+        spans_df = pd.DataFrame(diagnostics["spans"])
+        if not spans_df.empty:
+            spans_df["total_ms"] = spans_df["total_seconds"] * 1000
+            spans_df["max_ms"] = spans_df["max_seconds"] * 1000
+            st.dataframe(spans_df[["name", "calls", "total_ms", "max_ms"]], hide_index=True)
+        st.json(diagnostics["counters"])
+        st.download_button("Export Diagnostics (JSON)", data=instrumentation.to_json(diagnostics),
+                           file_name="diagnostics.json")
+
+if polling:
+    time.sleep(0.5)
+    st.rerun()
@@ -0,0 +1,202 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from simulation import simulate_strategy, simulate_multiple_runs, optimize_investment_split, compare_strategies
+
+STRATEGIES = list("ABCDEFG")
+
+BASE_PARAMS = {
+    'years': 10,
+    'graduation_month': 5,
+    'moratorium_months': 6,
+    'gross_annual_salary_usd': 90000,
+    'us_tax_rate': 0.25,
+    'monthly_expenses_usd': 2000,
+    'loan_amount_inr': 2500000,
+    'interest_rate_loan': 0.11,
+    'emi_inr': 27000,
+    'loan_term_months': 120,
+    'investment_rate_annual': 0.12,
+    'indian_tax_rate': 0.15,
+    'usd_to_inr_rate': 83.5,
+    'percent_to_invest': 50,
+    'threshold_pct': 50,
+    'moratorium_invest_pct': 100,
+    'risk_type': "Job Security",
+    'strategy': "B",
+    'enable_job_loss': False,
+    'job_loss_start': None,
+    'job_loss_duration': None,
+    'income_recovery_rate': None,
+    'enable_inflation': False,
+    'inflation_rate': 0,
+    'enable_fx_drift': False,
+    'fx_drift_rate': 0,
+}
+
+SCENARIOS = {
+    'job_loss': {'enable_job_loss': True, 'job_loss_start': 24, 'job_loss_duration': 6, 'income_recovery_rate': 50},
+    'inflation': {'enable_inflation': True, 'inflation_rate': 0.06},
+    'fx_drift': {'enable_fx_drift': True, 'fx_drift_rate': -0.03},
+}
+
+
+def benchmark_cases():
+    # name -> (callable, simulated months per call)
+    cases = {}
+    for strategy in STRATEGIES:
+        for years in (1, 10, 30):
+            params = dict(BASE_PARAMS, strategy=strategy, years=years)
+            cases[f"simulate_strategy/{strategy}/{years}y"] = (lambda p=params: simulate_strategy(p), years * 12)
+    for name, scenario in SCENARIOS.items():
+        params = dict(BASE_PARAMS, **scenario)
+        cases[f"simulate_strategy/B/10y/{name}"] = (lambda p=params: simulate_strategy(p), 120)
+    for runs in (100, 1_000, 10_000):
+        cases[f"simulate_multiple_runs/{runs}"] = (
+            lambda r=runs: simulate_multiple_runs(BASE_PARAMS, runs=r, seed=0), runs * 120)
+    for step in (1, 5):
+        points = len(range(0, 101, step))
+        cases[f"optimize_investment_split/step{step}"] = (
+            lambda s=step: optimize_investment_split(BASE_PARAMS, step=s), points * 120)
+    cases["compare_strategies/A-G"] = (
+        lambda: compare_strategies(dict(BASE_PARAMS, seed=0), STRATEGIES), len(STRATEGIES) * 120)
+    return cases
+
+
+def measure(fn, months, repeat=5, min_time=0.2):
+    # Calls per repeat are scaled so each repeat takes at least min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+
+    # Memory is traced in a separate call so tracing overhead stays out of the timings
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wall_time = statistics.median(times)
+    return {
+        'wall_time': wall_time,
+        'wall_time_min': min(times),
+        'peak_memory': peak,
+        'months_per_second': months / wall_time,
+        'calls_per_repeat': number,
+    }
+
+
+def run_benchmarks(filter=None, repeat=5, min_time=0.2, stream=sys.stdout):
+    results = {}
+    for name, (fn, months) in benchmark_cases().items():
+        if filter and filter not in name:
+            continue
+        results[name] = measure(fn, months, repeat, min_time)
+        if stream:
+            r = results[name]
+            print(f"{name:45s} {r['wall_time'] * 1e3:10.3f} ms {r['peak_memory'] / 2**20:9.2f} MiB "
+                  f"{r['months_per_second']:14,.0f} months/s", file=stream)
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.platform(),
+        },
+        'cases': results,
+    }
+
+
+def compare_to_baseline(current, baseline, threshold=20.0, memory_threshold=None):
+    # Rows of (case, metric, baseline, current, change %, regressed)
+    rows = []
+    for name, now in current['cases'].items():
+        before = baseline['cases'].get(name)
+        if before is None:
+            continue
+        checks = [('wall_time', threshold)]
+        if memory_threshold is not None:
+            checks.append(('peak_memory', memory_threshold))
+        for metric, limit in checks:
+            change = (now[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            rows.append((name, metric, before[metric], now[metric], change, change > limit))
+    return rows
+
+
+def missing_from_baseline(current, baseline):
+    # Current cases the baseline has no entry for (renamed or new cases)
+    return [name for name in current['cases'] if name not in baseline['cases']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulation.py and gate performance regressions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and write a JSON baseline")
+    run.add_argument("--output", default="bench_baseline.json")
+
+    compare = commands.add_parser("compare", help="run the suite and fail on regressions against a baseline")
+    compare.add_argument("--baseline", default="bench_baseline.json")
+    compare.add_argument("--threshold", type=float, default=20.0, help="max allowed wall time increase in %%")
+    compare.add_argument("--memory-threshold", type=float, default=None, help="max allowed peak memory increase in %%")
+    compare.add_argument("--output", default=None, help="also write the current results here")
+
+    for command in (run, compare):
+        command.add_argument("--filter", default=None, help="only cases whose name contains this text")
+        command.add_argument("--repeat", type=int, default=5)
+        command.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+
+    args = parser.parse_args(argv)
+    current = run_benchmarks(args.filter, args.repeat, args.min_time)
+
+    if args.command == "run":
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Wrote {len(current['cases'])} cases to {args.output}")
+        return 0
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare_to_baseline(current, baseline, args.threshold, args.memory_threshold)
+    regressions = [row for row in rows if row[5]]
+    print()
+    for name, metric, before, now, change, regressed in rows:
+        print(f"{'REGRESSION' if regressed else 'ok':10s} {name:45s} {metric:11s} {before:12.6g} -> {now:12.6g} ({change:+.1f}%)")
+    missing = missing_from_baseline(current, baseline)
+    for name in missing:
+        print(f"{'MISSING':10s} {name:45s} not in the baseline")
+    print(f"\n{len(regressions)} regression(s) over {len(rows)} checks")
+    if missing:
+        print(f"{len(missing)} case(s) missing from {args.baseline}; record a new baseline with `run`")
+    if not rows:
+        print("No cases were compared; check --filter and the baseline")
+    # A gate that checked nothing must not pass
+    return 1 if regressions or missing or not rows else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
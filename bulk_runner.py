@@ -0,0 +1,352 @@
+import argparse
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from result_store import ResultStore
+from simulation import BATCH_COLUMNS, simulate_batch
+from strategies import get_policy_class
+
+# Input rows use the same keys as the `params` dict in app.py, plus an
+# optional profile_id column (the input row number is used otherwise)
+ID_COLUMN = 'profile_id'
+REQUIRED_FIELDS = ['years', 'gross_annual_salary_usd', 'us_tax_rate', 'monthly_expenses_usd', 'loan_amount_inr',
+                   'interest_rate_loan', 'emi_inr', 'investment_rate_annual', 'usd_to_inr_rate']
+# Defaults match the app's sidebar; scenario fields only apply where toggled on
+DEFAULTS = {
+    'moratorium_months': 0,
+    'percent_to_invest': 50,
+    'threshold_pct': 50,
+    'moratorium_invest_pct': 100,
+    'risk_type': "Job Security",
+    'enable_job_loss': False,
+    'job_loss_start': 24,
+    'job_loss_duration': 6,
+    'income_recovery_rate': 50,
+    'enable_inflation': False,
+    'inflation_rate': 0.06,
+    'enable_fx_drift': False,
+    'fx_drift_rate': -0.03,
+}
+BOOLEAN_FIELDS = ['enable_job_loss', 'enable_inflation', 'enable_fx_drift']
+RISK_TYPES = ["Job Security", "Investment Volatility"]
+BOUNDS = {
+    'years': (1, None),
+    'moratorium_months': (0, None),
+    'gross_annual_salary_usd': (0, None),
+    'us_tax_rate': (0, 1),
+    'monthly_expenses_usd': (0, None),
+    'loan_amount_inr': (0, None),
+    'interest_rate_loan': (0, None),
+    'emi_inr': (0, None),
+    'usd_to_inr_rate': (0, None),
+    'percent_to_invest': (0, 100),
+    'threshold_pct': (0, 100),
+    'moratorium_invest_pct': (0, 100),
+    'job_loss_start': (0, None),
+    'job_loss_duration': (0, None),
+    'income_recovery_rate': (0, 100),
+}
+DEFAULT_STRATEGIES = list("ABCDEF")
+# Row-months per simulate_batch call, which bounds the monthly paths held at
+# once; summary-only runs use the same blocks so their results match
+BLOCK_CELLS = 2_000_000
+TRUE_TEXT = {'true', 't', 'yes', 'y', '1', '1.0'}
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet input/output needs pyarrow: pip install pyarrow") from None
+    return pyarrow.parquet
+
+
+def _arrow_csv():
+    # pyarrow writes CSV several times faster than pandas when it is installed
+    try:
+        import pyarrow
+        import pyarrow.csv
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _is_parquet(path):
+    return path.rstrip("/").endswith(".parquet")
+
+
+def read_chunks(path, chunk_size, skip_rows=0):
+    # DataFrames of exactly chunk_size rows (the last may be shorter),
+    # starting after skip_rows data rows
+    if not _is_parquet(path):
+        yield from pd.read_csv(path, chunksize=chunk_size, skiprows=range(1, skip_rows + 1))
+        return
+    pending = []
+    pending_rows = 0
+    for batch in _parquet().ParquetFile(path).iter_batches(batch_size=chunk_size):
+        if skip_rows >= batch.num_rows:
+            skip_rows -= batch.num_rows
+            continue
+        frame = batch.to_pandas().iloc[skip_rows:]
+        skip_rows = 0
+        pending.append(frame)
+        pending_rows += len(frame)
+        while pending_rows >= chunk_size:
+            merged = pd.concat(pending, ignore_index=True)
+            yield merged.iloc[:chunk_size]
+            pending = [merged.iloc[chunk_size:]]
+            pending_rows -= chunk_size
+    if pending_rows:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def _flag_values(values):
+    if values.dtype == bool:
+        return values.to_numpy()
+    text = values.astype(str).str.strip().str.lower()
+    return (text.isin(TRUE_TEXT) & values.notna()).to_numpy()
+
+
+def normalize_chunk(frame, first_row=0):
+    # (valid rows as a table of parameter columns, errors frame) for one chunk
+    size = len(frame)
+    ids = frame[ID_COLUMN].to_numpy() if ID_COLUMN in frame else np.arange(first_row, first_row + size)
+    problems = [[] for _ in range(size)]
+
+    def flag(mask, message):
+        for i in np.flatnonzero(mask):
+            problems[i].append(message)
+
+    table = {}
+    for field in BOOLEAN_FIELDS:
+        table[field] = _flag_values(frame[field]) if field in frame else np.full(size, DEFAULTS[field])
+
+    for field in REQUIRED_FIELDS + [key for key in DEFAULTS if key not in BOOLEAN_FIELDS and key != 'risk_type']:
+        if field not in frame:
+            if field in REQUIRED_FIELDS:
+                flag(np.ones(size, dtype=bool), f"missing {field}")
+                table[field] = np.full(size, np.nan)
+            else:
+                table[field] = np.full(size, float(DEFAULTS[field]))
+            continue
+        values = pd.to_numeric(frame[field], errors='coerce').to_numpy(dtype=float)
+        if field in DEFAULTS:
+            values = np.where(np.isnan(values), float(DEFAULTS[field]), values)
+        else:
+            flag(np.isnan(values), f"{field} is not a number")
+        low, high = BOUNDS.get(field, (None, None))
+        if low is not None:
+            flag(values < low, f"{field} below {low:g}")
+        if high is not None:
+            flag(values > high, f"{field} above {high:g}")
+        table[field] = values
+
+    months = table['years'] * 12
+    flag(np.isfinite(months) & (np.round(months) != months), "years must cover a whole number of months")
+    risk_type = frame['risk_type'].fillna(DEFAULTS['risk_type']) if 'risk_type' in frame else pd.Series(
+        [DEFAULTS['risk_type']] * size)
+    table['risk_type'] = risk_type.astype(str).str.strip().to_numpy(dtype=object)
+    flag(~np.isin(table['risk_type'], RISK_TYPES), "unknown risk_type")
+
+    valid = np.array([not row for row in problems], dtype=bool)
+    table = pd.DataFrame({key: values[valid] for key, values in table.items()})
+    table.insert(0, ID_COLUMN, ids[valid])
+    errors = pd.DataFrame({ID_COLUMN: ids[~valid],
+                           'error': ["; ".join(row) for row, ok in zip(problems, valid) if not ok]})
+    return table, errors
+
+
+def simulate_chunk(table, strategies, rng, on_paths=None):
+    # Every profile under every strategy, in blocks of about BLOCK_CELLS
+    # row-months; returns the summary frame in long format with profile_id
+    # and strategy columns. on_paths gets each block's monthly paths as a
+    # float32 ResultStore labelled the same way.
+    size = len(table)
+    months = int(table['years'].max() * 12) if size else 0
+    block = max(BLOCK_CELLS // max(months * len(strategies), 1), 1)
+    summaries = []
+    for start in range(0, size, block):
+        part = table.iloc[start:start + block]
+        rows = {key: np.repeat(part[key].to_numpy(), len(strategies)) for key in part.columns}
+        rows['strategy'] = np.tile(np.asarray(strategies, dtype=object), len(part))
+        store = False
+        if on_paths is not None:
+            store = ResultStore(len(rows['strategy']), months, BATCH_COLUMNS,
+                                labels={ID_COLUMN: rows[ID_COLUMN], 'strategy': rows['strategy']})
+        summary, _ = simulate_batch(rows, paths=store, seed=rng)
+        summary.insert(0, 'strategy', rows['strategy'])
+        summary.insert(0, ID_COLUMN, rows[ID_COLUMN])
+        summaries.append(summary)
+        if on_paths is not None:
+            on_paths(store)
+    return pd.concat(summaries, ignore_index=True)
+
+
+class ChunkWriter:
+    # Appends chunks to one CSV file, or writes part files named by chunk
+    # index into a Parquet dataset directory; truncate() rolls back to a
+    # checkpoint
+    def __init__(self, path):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        if self.parquet:
+            _parquet()
+
+    def _parts(self):
+        # part-<chunk>.parquet, or part-<chunk>-<block>.parquet for stores
+        parts = {}
+        for part in glob.glob(os.path.join(self.path, "part-*.parquet")):
+            parts.setdefault(int(os.path.basename(part)[5:11]), []).append(part)
+        return parts
+
+    def position(self):
+        # Bytes written (CSV) or the chunk index after the last part (Parquet)
+        if self.parquet:
+            return max(self._parts(), default=-1) + 1
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def truncate(self, position=0):
+        if self.parquet:
+            for index, parts in self._parts().items():
+                if index >= position:
+                    for part in parts:
+                        os.remove(part)
+        elif os.path.exists(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(position)
+
+    def write(self, frame, chunk_index):
+        if self.parquet:
+            os.makedirs(self.path, exist_ok=True)
+            frame.to_parquet(os.path.join(self.path, f"part-{chunk_index:06d}.parquet"), index=False)
+        else:
+            header = self.position() == 0
+            arrow = _arrow_csv()
+            if arrow is None:
+                frame.to_csv(self.path, mode="a", header=header, index=False)
+                return
+            options = arrow.csv.WriteOptions(include_header=header, quoting_style="needed")
+            with open(self.path, "ab") as f:
+                arrow.csv.write_csv(arrow.Table.from_pandas(frame, preserve_index=False), f, options)
+
+    def write_store(self, store, chunk_index, block):
+        # A ResultStore streamed out block by block; a chunk may span several
+        if self.parquet:
+            os.makedirs(self.path, exist_ok=True)
+            store.to_parquet(os.path.join(self.path, f"part-{chunk_index:06d}-{block:04d}.parquet"))
+        else:
+            header = self.position() == 0
+            with open(self.path, "ab") as f:
+                store.to_csv(f, header=header)
+
+
+def _save_checkpoint(path, state):
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(temporary, path)
+
+
+@timed("run_bulk")
+def run_bulk(input_path, output_path, strategies=None, paths_path=None, chunk_size=10_000, seed=None,
+             resume=False, checkpoint_path=None, errors_path=None, stream=sys.stderr):
+    strategies = list(strategies or DEFAULT_STRATEGIES)
+    for code in strategies:
+        get_policy_class(code)
+    checkpoint_path = checkpoint_path or output_path.rstrip("/") + ".checkpoint.json"
+    errors_path = errors_path or output_path.rstrip("/") + ".errors.csv"
+    writers = {'output': ChunkWriter(output_path), 'errors': ChunkWriter(errors_path)}
+    if paths_path:
+        writers['paths'] = ChunkWriter(paths_path)
+
+    settings = {'input': os.path.abspath(input_path), 'strategies': strategies, 'chunk_size': chunk_size,
+                'paths': bool(paths_path)}
+    state = None
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            state = json.load(f)
+        if state['settings'] != settings:
+            raise ValueError(f"Checkpoint {checkpoint_path} was written with different settings: {state['settings']}")
+    if state is None:
+        state = {'settings': settings, 'entropy': np.random.SeedSequence(seed).entropy, 'rows_done': 0,
+                 'chunks_done': 0, 'profiles_ok': 0, 'profiles_failed': 0, 'results': 0,
+                 'positions': {name: 0 for name in writers}}
+    # Drop anything written after the last checkpoint
+    for name, writer in writers.items():
+        writer.truncate(state['positions'].get(name, 0))
+
+    start = time.perf_counter()
+    rows_at_start = state['rows_done']
+    for frame in read_chunks(input_path, chunk_size, state['rows_done']):
+        chunk_index = state['chunks_done']
+        table, errors = normalize_chunk(frame, state['rows_done'])
+        if len(table):
+            # Chunk i always draws Strategy G splits from the same stream
+            rng = np.random.default_rng(np.random.SeedSequence(state['entropy'], spawn_key=(chunk_index,)))
+            on_paths = None
+            if paths_path:
+                blocks = itertools.count()
+                on_paths = lambda store: writers['paths'].write_store(store, chunk_index, next(blocks))
+            try:
+                summary = simulate_chunk(table, strategies, rng, on_paths)
+            except Exception as e:
+                # The chunk's profiles become errors; drop any paths it wrote
+                if paths_path:
+                    writers['paths'].truncate(state['positions']['paths'])
+                errors = pd.concat([errors, pd.DataFrame({ID_COLUMN: table[ID_COLUMN].to_numpy(),
+                                                          'error': f"simulation failed: {e}"})], ignore_index=True)
+                table = table.iloc[:0]
+            else:
+                writers['output'].write(summary, chunk_index)
+                state['results'] += len(summary)
+        if len(errors):
+            writers['errors'].write(errors, chunk_index)
+
+        state['rows_done'] += len(frame)
+        state['chunks_done'] += 1
+        state['profiles_ok'] += len(table)
+        state['profiles_failed'] += len(errors)
+        state['positions'] = {name: writer.position() for name, writer in writers.items()}
+        _save_checkpoint(checkpoint_path, state)
+        if stream:
+            elapsed = time.perf_counter() - start
+            rate = (state['rows_done'] - rows_at_start) / elapsed if elapsed else float("inf")
+            print(f"{state['rows_done']:,} profiles ({state['profiles_failed']:,} invalid), "
+                  f"{rate:,.0f} profiles/s", file=stream)
+
+    elapsed = time.perf_counter() - start
+    state['seconds'] = elapsed
+    state['profiles_per_second'] = (state['rows_done'] - rows_at_start) / elapsed if elapsed else float("inf")
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate every profile in a CSV/Parquet file under several strategies.")
+    parser.add_argument("input", help="CSV or .parquet file, one profile per row with the app's params keys")
+    parser.add_argument("output", help="summary output: a .csv file or a .parquet dataset directory")
+    parser.add_argument("--strategies", default="".join(DEFAULT_STRATEGIES), help="strategy codes, e.g. ABF")
+    parser.add_argument("--paths", default=None, help="also write monthly paths here (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="profiles per chunk")
+    parser.add_argument("--seed", type=int, default=None, help="seed for Strategy G")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint of an interrupted run")
+    parser.add_argument("--checkpoint", default=None, help="defaults to <output>.checkpoint.json")
+    parser.add_argument("--errors", default=None, help="invalid rows, defaults to <output>.errors.csv")
+    args = parser.parse_args(argv)
+
+    state = run_bulk(args.input, args.output, list(args.strategies.replace(",", "")), args.paths, args.chunk_size,
+                     args.seed, args.resume, args.checkpoint, args.errors)
+    print(f"Done: {state['profiles_ok']:,} profiles simulated, {state['profiles_failed']:,} invalid, "
+          f"{state['results']:,} results in {state['seconds']:.1f}s ({state['profiles_per_second']:,.0f} profiles/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count
+from simulation import (simulate_strategy, simulate_summary, compare_strategies, optimize_investment_split,
+                        simulate_multiple_runs)
+from montecarlo import run_monte_carlo
+from pareto import pareto_frontier
+from paths import model_settings
+
+# Scenario inputs that only matter while their toggle is on
+SCENARIO_FIELDS = {
+    'enable_job_loss': ['job_loss_start', 'job_loss_duration', 'income_recovery_rate'],
+    'enable_inflation': ['inflation_rate'],
+    'enable_fx_drift': ['fx_drift_rate'],
+}
+
+MISSING = object()
+
+# Bump when cached results change meaning without any change to the engine
+# sources below (e.g. a different pickle layout)
+CACHE_VERSION = 1
+ENGINE_SOURCES = ['simulation.py', 'strategies.py', 'montecarlo.py', 'paths.py', 'pareto.py', 'optimizer.py',
+                  'result_store.py']
+
+
+def engine_version():
+    # Salts every key, so results computed (and pickled to disk) by another
+    # version of the engine or of numpy / pandas are never served as current
+    digest = hashlib.sha256(f"{CACHE_VERSION} {np.__version__} {pd.__version__}".encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ENGINE_SOURCES:
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+ENGINE_VERSION = engine_version()
+
+
+def _canonical(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def normalize_params(params):
+    normalized = dict(params)
+    for flag, fields in SCENARIO_FIELDS.items():
+        normalized[flag] = bool(normalized.get(flag))
+        if not normalized[flag]:
+            for field in fields:
+                normalized.pop(field, None)
+    return _canonical(normalized)
+
+
+def params_key(namespace, params, **arguments):
+    payload = {'engine': ENGINE_VERSION, 'namespace': namespace, 'params': normalize_params(params), 'arguments': _canonical(arguments)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    # Size-bounded LRU of pickled results, with an optional on-disk tier that
+    # survives restarts. Values are stored pickled so callers can never mutate
+    # a cached DataFrame in place. The disk tier has its own byte budget and
+    # evicts least recently used files first, going by mtime (refreshed on
+    # every hit), so processes sharing the directory share one LRU order.
+    def __init__(self, max_bytes=256 * 2**20, disk_dir=None, disk_max_bytes=1024 * 2**20):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            with self._disk_lock:
+                self._trim_disk()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".pkl")
+
+    def _disk_files(self):
+        files = []
+        for folder, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(".pkl"):
+                    path = os.path.join(folder, name)
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((info.st_mtime_ns, info.st_size, path))
+        return files
+
+    def _trim_disk(self):
+        # Rescans the directory, so files written by other processes count
+        # towards the budget too
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+            count("cache_disk_evictions")
+        self._disk_bytes = total
+
+    @staticmethod
+    def _touch(path):
+        # Explicit nanosecond times: the filesystem's own clock is too coarse
+        # to order writes that land a few microseconds apart
+        now = time.time_ns()
+        try:
+            os.utime(path, ns=(now, now))
+        except OSError:
+            pass
+
+    def _store(self, key, blob):
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        if len(blob) > self.max_bytes:
+            return
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+            count("cache_evictions")
+
+    def get(self, key):
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                count("cache_hits")
+                return pickle.loads(blob)
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    blob = f.read()
+            except OSError:
+                blob = None
+            if blob is not None:
+                self._touch(self._disk_path(key))
+                with self._lock:
+                    self._store(key, blob)
+                    self.hits += 1
+                    self.disk_hits += 1
+                count("cache_hits")
+                count("cache_disk_hits")
+                return pickle.loads(blob)
+        with self._lock:
+            self.misses += 1
+        count("cache_misses")
+        return MISSING
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._store(key, blob)
+        if self.disk_dir and len(blob) <= self.disk_max_bytes:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp, "wb") as f:
+                f.write(blob)
+            os.replace(temp, path)
+            self._touch(path)
+            with self._disk_lock:
+                self._disk_bytes += len(blob)
+                if self._disk_bytes > self.disk_max_bytes:
+                    self._trim_disk()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'disk_evictions': self.disk_evictions,
+                'disk_bytes': self._disk_bytes,
+                'disk_max_bytes': self.disk_max_bytes,
+            }
+
+
+# Shared by every Streamlit session in this process
+default_cache = ResultCache(
+    max_bytes=int(os.environ.get("SIM_CACHE_MAX_MB", "256")) * 2**20,
+    disk_dir=os.environ.get("SIM_CACHE_DIR") or None,
+    disk_max_bytes=int(os.environ.get("SIM_CACHE_DISK_MAX_MB", "1024")) * 2**20,
+)
+
+
+def _memoize(namespace, params, compute, cacheable=True, cache=None, **arguments):
+    # Random results are only reproducible, and so only cacheable, with a seed
+    if not cacheable:
+        return compute()
+    cache = default_cache if cache is None else cache
+    return cache.get_or_compute(params_key(namespace, params, **arguments), compute)
+
+
+def cached_simulate_strategy(params, cache=None, simulate=None):
+    # simulate replaces simulate_strategy on a miss, e.g. IncrementalSimulator.run
+    seeded = params.get('strategy') != 'G' or params.get('seed') is not None
+    simulate = simulate_strategy if simulate is None else simulate
+    return _memoize('simulate_strategy', params, lambda: simulate(params), seeded, cache)
+
+
+def cached_simulate_summary(params, cache=None):
+    seeded = params.get('strategy') != 'G' or params.get('seed') is not None
+    return _memoize('simulate_summary', params, lambda: simulate_summary(params), seeded, cache)
+
+
+def cached_compare_strategies(params, strategies, cache=None):
+    # Cached per strategy, so any selection reuses strategies already compared.
+    # Runs in this process so the lookups see (and fill) this process's cache.
+    return compare_strategies(params, strategies, summarize=lambda test_params: cached_simulate_summary(test_params, cache),
+                              executor="serial")
+
+
+def optimize_split_key(params, step=5, method="grid", tol=0.1):
+    return params_key('optimize_investment_split', params, step=step, method=method, tol=tol)
+
+
+def cached_optimize_investment_split(params, step=5, method="grid", tol=0.1, cache=None):
+    cache = default_cache if cache is None else cache
+    return cache.get_or_compute(optimize_split_key(params, step, method, tol),
+                                lambda: optimize_investment_split(params, step=step, method=method, tol=tol))
+
+
+def cached_simulate_multiple_runs(params, runs=100, seed=None, cache=None):
+    return _memoize('simulate_multiple_runs', params, lambda: simulate_multiple_runs(params, runs=runs, seed=seed),
+                    seed is not None, cache, runs=runs, seed=seed)
+
+
+def monte_carlo_key(params, runs=1000, seed=None, **options):
+    # The executor and chunk size change where and how runs are grouped, not
+    # the result
+    key_options = {name: value for name, value in options.items()
+                   if name not in ('executor', 'on_chunk', 'chunk_size')}
+    if key_options.get('market') is not None:
+        key_options['market'] = model_settings(key_options['market'])
+    return params_key('run_monte_carlo', params, runs=runs, seed=seed, **key_options)
+
+
+def cached_run_monte_carlo(params, runs=1000, seed=None, cache=None, **options):
+    compute = lambda: run_monte_carlo(params, runs=runs, seed=seed, **options)
+    if seed is None or 'on_chunk' in options:
+        return compute()
+    cache = default_cache if cache is None else cache
+    return cache.get_or_compute(monte_carlo_key(params, runs, seed, **options), compute)
+
+
+def cached_pareto_frontier(params, strategies=None, step=5, job_loss_starts=None, cache=None):
+    seeded = 'G' not in (strategies or []) or params.get('seed') is not None
+    compute = lambda: pareto_frontier(params, strategies, step, job_loss_starts)
+    return _memoize('pareto_frontier', params, compute, seeded, cache, strategies=strategies, step=step,
+                    job_loss_starts=job_loss_starts)
@@ -0,0 +1,89 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from montecarlo import FAN_CHART_CHUNK, FAN_CHART_PERCENTILES, FanChart
+
+# Figures are built from aggregates only: long series are downsampled to a
+# point budget, distributions come as pre-binned counts and many paths as
+# percentile bands, so a chart's payload depends on the budget rather than on
+# how many months or runs were simulated.
+CHART_POINTS = 1000  # about one point per horizontal pixel of a wide chart
+BAND_COLOR = (31, 119, 180)
+
+
+def lttb(x, y, points=CHART_POINTS):
+    # Indices kept by Largest-Triangle-Three-Buckets: the first and last
+    # point, plus in each bucket the point forming the largest triangle with
+    # the previously kept point and the mean of the next bucket
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        low, high = edges[i], edges[i + 1]
+        next_high = edges[i + 2] if i + 2 < len(edges) else n
+        mean_x, mean_y = x[high:next_high].mean(), y[high:next_high].mean()
+        area = np.abs((x[a] - mean_x) * (y[low:high] - y[a]) - (x[a] - x[low:high]) * (mean_y - y[a]))
+        a = low + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(frame, columns, x=None, points=CHART_POINTS):
+    # Rows kept for any of the columns, so every line shares the same x values
+    frame = frame.dropna(subset=columns)
+    xs = frame.index if x is None else frame[x]
+    keep = np.unique(np.concatenate([lttb(xs, frame[column], points) for column in columns]))
+    return frame.iloc[keep]
+
+
+def line_figure(frame, columns, x=None, points=CHART_POINTS, markers=False, x_title=None, y_title=None):
+    frame = downsample(frame, columns, x, points)
+    xs = frame.index if x is None else frame[x]
+    fig = go.Figure([go.Scatter(x=xs, y=frame[column], name=column, mode="lines+markers" if markers else "lines")
+                     for column in columns])
+    fig.update_layout(xaxis_title=x_title or (x or frame.index.name), yaxis_title=y_title or "value",
+                      showlegend=len(columns) > 1)
+    return fig
+
+
+def histogram_figure(edges, counts, x_title=None):
+    # Bars from (edges, counts), e.g. StreamingHistogram.rebin, instead of
+    # the raw values px.histogram would bin in the browser
+    edges = np.asarray(edges, dtype=float)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name="count"))
+    fig.update_layout(xaxis_title=x_title, yaxis_title="count", bargap=0)
+    return fig
+
+
+def path_bands(store, column="Net Worth", percentiles=FAN_CHART_PERCENTILES, bins=512, chunk_paths=FAN_CHART_CHUNK):
+    # Monthly percentile bands over every path in a ResultStore, streamed in
+    # blocks of chunk_paths paths
+    fan = FanChart(store.months, bins)
+    for start in range(0, store.paths, chunk_paths):
+        fan.update(np.asarray(store[column][start:start + chunk_paths], dtype=float).T)
+    return fan.bands(percentiles)
+
+
+def band_figure(bands, points=CHART_POINTS, y_title=None):
+    # Shaded P5-P95 and P25-P75 bands (or the outermost pairs present) with
+    # the median on top, for a FanChart.bands() style frame
+    percentiles = sorted(int(name[1:]) for name in bands.columns if name.startswith("P"))
+    pairs = list(zip(percentiles, reversed(percentiles)))[:len(percentiles) // 2]
+    bands = downsample(bands, [f"P{q}" for q in percentiles], points=points)
+    fig = go.Figure()
+    for layer, (low, high) in enumerate(pairs):
+        opacity = 0.2 * (layer + 1)
+        fig.add_trace(go.Scatter(x=bands.index, y=bands[f"P{high}"], line=dict(width=0), showlegend=False,
+                                 hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands[f"P{low}"], line=dict(width=0), fill="tonexty",
+                                 fillcolor=f"rgba{(*BAND_COLOR, opacity)}", name=f"P{low}–P{high}"))
+    if 50 in percentiles:
+        fig.add_trace(go.Scatter(x=bands.index, y=bands["P50"], line=dict(color=f"rgb{BAND_COLOR}"), name="Median"))
+    fig.update_layout(xaxis_title=bands.index.name, yaxis_title=y_title)
+    return fig
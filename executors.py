@@ -0,0 +1,67 @@
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTOR_KINDS = ["serial", "thread", "process"]
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _run_chunk(fn, chunk):
+    return [fn(item) for item in chunk]
+
+
+def chunked(items, chunk_size):
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+class Executor:
+    # Maps a function over items on one core or a shared worker pool. Items
+    # are sent in chunks to amortize task/IPC overhead and results always come
+    # back in input order. With the process pool, fn and items must pickle.
+    def __init__(self, kind="serial", workers=None, chunk_size=None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind {kind!r}, expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.workers = 1 if kind == "serial" else (workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+
+    def __repr__(self):
+        return f"Executor(kind={self.kind!r}, workers={self.workers})"
+
+    def _pool(self):
+        # Pools are shared process-wide so repeated sweeps skip worker start-up
+        with _pools_lock:
+            pool = _pools.get((self.kind, self.workers))
+            if pool is None:
+                pool_class = ThreadPoolExecutor if self.kind == "thread" else ProcessPoolExecutor
+                pool = _pools[(self.kind, self.workers)] = pool_class(max_workers=self.workers)
+            return pool
+
+    def map(self, fn, items):
+        items = list(items)
+        if self.kind == "serial" or self.workers == 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        chunk_size = self.chunk_size or max(1, math.ceil(len(items) / (self.workers * 4)))
+        chunks = chunked(items, chunk_size)
+        results = self._pool().map(_run_chunk, [fn] * len(chunks), chunks)
+        return [result for chunk in results for result in chunk]
+
+
+def get_executor(executor=None):
+    # None picks the deployment default from SIM_EXECUTOR / SIM_WORKERS
+    if isinstance(executor, Executor):
+        return executor
+    if executor is None:
+        workers = os.environ.get("SIM_WORKERS")
+        return Executor(os.environ.get("SIM_EXECUTOR", "serial"), int(workers) if workers else None)
+    return Executor(executor)
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
@@ -0,0 +1,129 @@
+import math
+import random
+
+import numpy as np
+
+from instrumentation import count, timed
+from simulation import INERT_FIELDS, MONTHLY_COLUMNS, SimulationResult, SimulationState, _run_months, empty_columns
+from strategies import RandomSplit, get_policy
+
+MISSING = object()
+# Inputs that only move the salary, inside the job loss window
+JOB_LOSS_FIELDS = {'enable_job_loss', 'job_loss_start', 'job_loss_duration', 'income_recovery_rate'}
+# Inputs that are only read by the allocation policies
+ALLOCATION_FIELDS = {'strategy', 'percent_to_invest', 'threshold_pct', 'moratorium_invest_pct', 'moratorium_months',
+                     'risk_type', 'seed'}
+
+
+def _first_difference(old, new):
+    changed = np.flatnonzero(old != new)
+    return int(changed[0]) + 1 if len(changed) else None
+
+
+def _salary_path(params, months):
+    # Effective salary for months 1..months, as the monthly loop computes it
+    salary = np.full(months, float(params["gross_annual_salary_usd"]))
+    if params.get("enable_job_loss", False):
+        month = np.arange(1, months + 1)
+        job_loss_start = params.get("job_loss_start", 0)
+        job_loss_end = job_loss_start + params.get("job_loss_duration", 0)
+        reduced = params["gross_annual_salary_usd"] * (params.get("income_recovery_rate", 0) / 100)
+        salary[(job_loss_start <= month) & (month <= job_loss_end)] = reduced
+    return salary
+
+
+def _first_allocation_change(old, new, loan_before, months):
+    old_policy, new_policy = get_policy(old), get_policy(new)
+    if old.get('strategy') != new.get('strategy') and (old_policy.get_state() is not None
+                                                      or new_policy.get_state() is not None):
+        return 1  # a checkpoint of one policy's state cannot seed the other
+    if not old_policy.varies and not new_policy.varies:
+        # Both shares only switch once, after their moratorium
+        switches = {1, math.floor(old_policy.moratorium) + 1, math.floor(new_policy.moratorium) + 1}
+        for month in sorted(month for month in switches if 1 <= month <= months):
+            if old_policy.share(month, None) != new_policy.share(month, None):
+                return month
+        return None
+    # Balance-driven or random policies are replayed along the old loan path,
+    # which is still the actual path up to the first difference
+    for month in range(1, months + 1):
+        if old_policy.share(month, loan_before[month - 1]) != new_policy.share(month, loan_before[month - 1]):
+            return month
+    return None
+
+
+def _unseeded_random(params):
+    # Unseeded Strategy G draws a fresh sample from the global stream on every
+    # run, so no part of an earlier run stands in for a new one
+    policy = get_policy(params)
+    return isinstance(policy, RandomSplit) and policy.rng is random
+
+
+def first_affected_month(old, new, old_columns):
+    # First month whose result can differ between two parameter sets, given
+    # the monthly columns of the old run; old horizon + 1 if none differ
+    if _unseeded_random(old) or _unseeded_random(new):
+        return 1
+    old_months, new_months = old['years'] * 12, new['years'] * 12
+    months = min(old_months, new_months)
+    changed = {key for key in set(old) | set(new) if old.get(key, MISSING) != new.get(key, MISSING)}
+    changed -= set(INERT_FIELDS)
+    if changed - JOB_LOSS_FIELDS - ALLOCATION_FIELDS - {'years'}:
+        return 1
+
+    first = old_months + 1
+    if changed & JOB_LOSS_FIELDS:
+        month = _first_difference(_salary_path(old, months), _salary_path(new, months))
+        if month is not None:
+            first = min(first, month)
+    # A policy may also read the horizon (e.g. a glide path)
+    if changed & (ALLOCATION_FIELDS | {'years'}):
+        loan_before = np.concatenate([[old['loan_amount_inr']], old_columns['Loan Balance'][:months - 1]])
+        month = _first_allocation_change(old, new, loan_before, min(months, first - 1))
+        if month is not None:
+            first = min(first, month)
+    return first
+
+
+class IncrementalSimulator:
+    # simulate_strategy for a sequence of parameter sets (one Streamlit
+    # session's sidebar edits): keeps a state checkpoint every
+    # checkpoint_every months and resumes each run from the last checkpoint
+    # before the first affected month, reusing the unchanged prefix
+    def __init__(self, checkpoint_every=12):
+        self.checkpoint_every = checkpoint_every
+        self.params = None
+        self.columns = None
+        self.checkpoints = []
+        self.last_resume_month = 0
+        self.months_reused = 0
+        self.months_simulated = 0
+
+    @timed("incremental_run")
+    def run(self, params):
+        params = dict(params)
+        count("simulations_run")
+        state = SimulationState.initial(params)
+        if self.params is not None:
+            first = first_affected_month(self.params, params, self.columns)
+            resume_by = min(first - 1, params['years'] * 12)
+            for checkpoint in self.checkpoints:
+                if checkpoint.month <= resume_by:
+                    state = checkpoint
+
+        columns = empty_columns(params)
+        if state.month:
+            for name in MONTHLY_COLUMNS:
+                if name != 'EMI':
+                    columns[name][:state.month] = self.columns[name][:state.month]
+        checkpoints = [checkpoint for checkpoint in self.checkpoints if checkpoint.month <= state.month]
+        final = _run_months(params, state, columns, checkpoints, self.checkpoint_every)
+        if not checkpoints or checkpoints[-1].month < final.month:
+            checkpoints.append(final)  # a longer horizon later continues from here
+
+        count("incremental_months_reused", state.month)
+        self.last_resume_month = state.month
+        self.months_reused += state.month
+        self.months_simulated += final.month - state.month
+        self.params, self.columns, self.checkpoints = params, columns, checkpoints
+        return SimulationResult(final.summary(), columns)
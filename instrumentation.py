@@ -0,0 +1,108 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Off unless SIM_PROFILE is set or a thread turns it on; while off, span()
+# and count() cost a single flag check
+_enabled_default = os.environ.get("SIM_PROFILE", "") not in ("", "0")
+_local = threading.local()
+_NULL_SPAN = nullcontext()
+
+
+class _Recorder:
+    def __init__(self):
+        self.spans = {}
+        self.counters = {}
+        self.stack = []
+
+
+def _recorder():
+    recorder = getattr(_local, "recorder", None)
+    if recorder is None:
+        recorder = _local.recorder = _Recorder()
+    return recorder
+
+
+def is_enabled():
+    return getattr(_local, "enabled", _enabled_default)
+
+
+def set_enabled(enabled=True):
+    # Applies to the calling thread (one Streamlit session's script run)
+    _local.enabled = bool(enabled)
+
+
+class _Span:
+    __slots__ = ("name", "path", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        recorder = _recorder()
+        recorder.stack.append(self.name)
+        self.path = "/".join(recorder.stack)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        recorder = _recorder()
+        recorder.stack.pop()
+        stats = recorder.spans.get(self.path)
+        if stats is None:
+            stats = recorder.spans[self.path] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+        return False
+
+
+def span(name):
+    # Nested spans are recorded under their full path, e.g.
+    # "app.monte_carlo/run_monte_carlo/simulate_batch"
+    if not is_enabled():
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name):
+    # Decorator form of span() for whole functions
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    if not is_enabled():
+        return
+    counters = _recorder().counters
+    counters[name] = counters.get(name, 0) + n
+
+
+def reset():
+    _local.recorder = _Recorder()
+
+
+def snapshot():
+    recorder = _recorder()
+    return {
+        "spans": [
+            {"name": path, "calls": calls, "total_seconds": total, "max_seconds": longest}
+            for path, (calls, total, longest) in sorted(recorder.spans.items())
+        ],
+        "counters": dict(sorted(recorder.counters.items())),
+    }
+
+
+def to_json(data=None):
+    return json.dumps(snapshot() if data is None else data, indent=2)
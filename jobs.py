@@ -0,0 +1,215 @@
+import copy
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import MISSING, default_cache, monte_carlo_key, optimize_split_key
+import instrumentation
+from instrumentation import count, span
+from montecarlo import MonteCarloResult, run_monte_carlo
+from optimizer import INV_PHI
+from simulation import MONTE_CARLO_BLOCK, MONTE_CARLO_CHUNK, optimize_investment_split
+
+JOB_STATES = ("pending", "running", "done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    # Handle shared by every session that asked for the same computation.
+    # The worker calls report() with progress (0-1) and an optional partial
+    # result; report() raises JobCancelled once nobody wants the result.
+    def __init__(self, key, label=""):
+        self.key = key
+        self.label = label
+        self.status = "pending"
+        self.progress = 0.0
+        self.partial = None
+        self.result = None
+        self.error = None
+        # Timings recorded on the worker when the submitting thread had
+        # instrumentation on (it is thread-local, so the flag is carried over)
+        self.profile = instrumentation.is_enabled()
+        self.diagnostics = None
+        self.subscribers = 1
+        self.submitted = time.time()
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.submitted
+
+    def report(self, progress, partial=None):
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+        with self._lock:
+            self.progress = min(max(progress, 0.0), 1.0)
+            if partial is not None:
+                self.partial = partial
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self._finish("cancelled")
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            if status == "done":
+                self.progress = 1.0
+            self.finished = time.time()
+
+
+class JobManager:
+    # Worker pool shared by every Streamlit session in the process. Jobs are
+    # keyed like the result cache, so identical requests from concurrent
+    # sessions attach to one running job instead of starting another.
+    def __init__(self, workers=2, keep=32):
+        self.workers = workers
+        self.keep = keep
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="sim-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, label=""):
+        # fn(job) runs on a worker and returns the result
+        with self._lock:
+            job = self._jobs.get(key)
+            # A job whose last subscriber left is on its way out even while
+            # its status still says running
+            if job is not None and job.status not in ("failed", "cancelled") and not job.cancel_requested:
+                job.subscribers += 1
+                self._jobs.move_to_end(key)
+                count("job_dedup_hits")
+                return job
+            job = Job(key, label)
+            self._jobs[key] = job
+            self._trim()
+            job.future = self._pool.submit(self._run, job, fn)
+            count("jobs_submitted")
+            return job
+
+    def completed(self, key, result, label=""):
+        # Handle for a result that is already known (e.g. a cache hit)
+        job = Job(key, label)
+        job._finish("done", result)
+        return job
+
+    def release(self, job):
+        # The session no longer wants the result; cancel it if nobody else does
+        with self._lock:
+            job.subscribers -= 1
+            if job.subscribers <= 0 and not job.done:
+                job.cancel()
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _trim(self):
+        finished = [key for key, job in self._jobs.items() if job.done]
+        for key in finished[:max(len(self._jobs) - self.keep, 0)]:
+            del self._jobs[key]
+
+    def _run(self, job, fn):
+        if job.cancel_requested:
+            job._finish("cancelled")
+            return
+        job.status = "running"
+        instrumentation.set_enabled(job.profile)
+        instrumentation.reset()
+        status, result, error = "done", None, None
+        try:
+            with span("job"):
+                result = fn(job)
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", e
+        if job.profile:
+            job.diagnostics = instrumentation.snapshot()
+        job._finish(status, result, error)
+
+    def shutdown(self):
+        for job in self.jobs():
+            job.cancel()
+        self._pool.shutdown(wait=True)
+
+
+default_jobs = JobManager(workers=int(os.environ.get("SIM_JOB_WORKERS", "2")))
+
+
+def progress_chunk(runs):
+    # Monte Carlo chunk size giving about 20 progress updates (it does not
+    # change the result)
+    return min(MONTE_CARLO_CHUNK, max(MONTE_CARLO_BLOCK, math.ceil(runs / 20)))
+
+
+def submit_monte_carlo(params, runs=1000, seed=None, manager=None, cache=None, chunk_size=None, **options):
+    # Partial results are MonteCarloResult snapshots (running stats and
+    # histogram) after every chunk; the final result is also cached
+    manager = default_jobs if manager is None else manager
+    cache = default_cache if cache is None else cache
+    chunk_size = progress_chunk(runs) if chunk_size is None else chunk_size
+    params = dict(params)
+    key = monte_carlo_key(params, runs, seed, **options)
+    if seed is not None:
+        cached = cache.get(key)
+        if cached is not MISSING:
+            return manager.completed(key, cached, "Monte Carlo")
+
+    def work(job):
+        def on_chunk(stats, histogram):
+            snapshot = MonteCarloResult(seed, copy.deepcopy(stats), copy.deepcopy(histogram), None, False)
+            job.report(stats.count / runs, snapshot)
+        result = run_monte_carlo(params, runs=runs, seed=seed, chunk_size=chunk_size, on_chunk=on_chunk, **options)
+        if seed is not None:
+            cache.put(key, result)
+        return result
+    return manager.submit(key, work, "Monte Carlo")
+
+
+def _expected_evaluations(step, method, tol):
+    grid = len(range(0, 101, step)) + (100 % step != 0)
+    if method != "golden":
+        return len(range(0, 101, step))
+    # Bracketing grid, then golden-section steps down to tol
+    return grid + 2 + max(math.ceil(math.log(tol / (2 * step)) / math.log(INV_PHI)), 0)
+
+
+def submit_optimization(params, step=5, method="grid", tol=0.1, manager=None, cache=None):
+    # Partial results are the curve evaluated so far
+    manager = default_jobs if manager is None else manager
+    cache = default_cache if cache is None else cache
+    params = dict(params)
+    key = optimize_split_key(params, step, method, tol)
+    cached = cache.get(key)
+    if cached is not MISSING:
+        return manager.completed(key, cached, "Optimization")
+    expected = _expected_evaluations(step, method, tol)
+
+    def work(job):
+        def on_point(curve):
+            job.report(min(len(curve) / expected, 0.99), curve)
+        result = optimize_investment_split(params, step=step, method=method, tol=tol, on_point=on_point)
+        cache.put(key, result)
+        return result
+    return manager.submit(key, work, "Optimization")
@@ -0,0 +1,234 @@
+import math
+import operator
+
+import numpy as np
+import pandas as pd
+
+from executors import get_executor
+from instrumentation import span, timed
+from simulation import MONTE_CARLO_CHUNK, monte_carlo_chunks
+
+# Paths per chunk when monthly net worth is kept for the fan chart
+# (a float32 months x paths block, about 29 MB for 20k paths over 30 years)
+FAN_CHART_CHUNK = 20_000
+FAN_CHART_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class StreamingStats:
+    # Running count / mean / variance, merged chunk by chunk (Chan et al.)
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        count = len(values)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def std_error(self):
+        return self.std / math.sqrt(self.count) if self.count else math.inf
+
+
+class StreamingHistogram:
+    # Fixed number of equal-width bins whose range doubles whenever a chunk
+    # falls outside it, so quantiles stay within one bin width of exact.
+    # Non-finite values have no bin (the range would grow forever); they are
+    # only counted in `dropped`.
+    def __init__(self, bins=2048):
+        if bins % 2:
+            raise ValueError("bins must be even")
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.lo = None
+        self.width = None
+        self.dropped = 0
+
+    @property
+    def edges(self):
+        return self.lo + self.width * np.arange(self.bins + 1)
+
+    def _grow(self, low, high):
+        half = self.bins // 2
+        while low < self.lo:
+            merged = self.counts.reshape(half, 2).sum(axis=1)
+            self.counts = np.concatenate([np.zeros(half, dtype=np.int64), merged])
+            self.lo -= self.width * self.bins
+            self.width *= 2
+        while high >= self.lo + self.width * self.bins:
+            merged = self.counts.reshape(half, 2).sum(axis=1)
+            self.counts = np.concatenate([merged, np.zeros(half, dtype=np.int64)])
+            self.width *= 2
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        finite = np.isfinite(values)
+        if not finite.all():
+            self.dropped += int(len(values) - finite.sum())
+            values = values[finite]
+        if not len(values):
+            return
+        low, high = float(values.min()), float(values.max())
+        if self.lo is None:
+            span = high - low
+            if span == 0:
+                span = max(abs(low), 1.0)
+            self.lo = low - 0.25 * span
+            self.width = 1.5 * span / self.bins
+        self._grow(low, high)
+        index = ((values - self.lo) / self.width).astype(np.int64)
+        self.counts += np.bincount(np.clip(index, 0, self.bins - 1), minlength=self.bins)
+
+    def quantile(self, q):
+        total = self.counts.sum()
+        if not total:
+            return math.nan
+        cumulative = np.cumsum(self.counts)
+        target = q * total
+        i = int(np.searchsorted(cumulative, target, side='left'))
+        i = min(i, self.bins - 1)
+        before = cumulative[i - 1] if i else 0
+        inside = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        return self.lo + self.width * (i + inside)
+
+    def rebin(self, bins=30, low=None, high=None):
+        # Coarser histogram over [low, high] for display
+        low = self.lo if low is None else low
+        high = self.lo + self.width * self.bins if high is None else high
+        edges = np.linspace(low, high, bins + 1)
+        centers = self.edges[:-1] + self.width / 2
+        index = np.clip(np.searchsorted(edges, centers, side='right') - 1, 0, bins - 1)
+        return edges, np.bincount(index, weights=self.counts, minlength=bins).astype(np.int64)
+
+
+class FanChart:
+    # One streaming histogram per month, so percentile bands over any number
+    # of paths take months x bins memory
+    def __init__(self, months, bins=512):
+        self.histograms = [StreamingHistogram(bins) for _ in range(months)]
+        self.sums = np.zeros(months)
+        self.counts = np.zeros(months, dtype=np.int64)
+
+    def update(self, net_worth):
+        # net_worth is (months, paths); NaN marks months past a path's horizon
+        missing = np.isnan(net_worth)
+        padded = missing.any()
+        for values, gaps, histogram in zip(net_worth, missing, self.histograms):
+            histogram.update(values[~gaps] if padded else values)
+        self.sums += np.where(missing, 0, net_worth).sum(axis=1, dtype=float) if padded else \
+            net_worth.sum(axis=1, dtype=float)
+        self.counts += net_worth.shape[1] - missing.sum(axis=1)
+
+    def bands(self, percentiles=FAN_CHART_PERCENTILES):
+        bands = pd.DataFrame({f"P{q}": [histogram.quantile(q / 100) for histogram in self.histograms]
+                              for q in percentiles},
+                             index=pd.RangeIndex(1, len(self.histograms) + 1, name="Month"))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bands['Mean'] = np.where(self.counts > 0, self.sums / self.counts, math.nan)
+        return bands
+
+
+class MonteCarloResult:
+    def __init__(self, seed, stats, histogram, history, converged, fan=None):
+        self.seed = seed
+        self.stats = stats
+        self.histogram = histogram
+        self.history = history
+        self.converged = converged
+        self.fan = fan
+
+    @property
+    def runs(self):
+        return self.stats.count
+
+    def quantile(self, q):
+        # Clamp to the exact extremes tracked by the running stats
+        return min(max(self.histogram.quantile(q), self.stats.min), self.stats.max)
+
+    def describe(self):
+        return pd.Series({
+            'count': float(self.stats.count),
+            'mean': self.stats.mean,
+            'std': self.stats.std,
+            'min': self.stats.min,
+            '25%': self.quantile(0.25),
+            '50%': self.quantile(0.50),
+            '75%': self.quantile(0.75),
+            'max': self.stats.max,
+            'std_error': self.stats.std_error,
+        }, name='Final Net Worth (INR)')
+
+    def display_histogram(self, bins=30):
+        return self.histogram.rebin(bins, self.stats.min, self.stats.max)
+
+
+@timed("run_monte_carlo")
+def run_monte_carlo(params, runs=1000, seed=None, chunk_size=MONTE_CARLO_CHUNK, tol=None, rtol=None,
+                    bins=2048, on_chunk=None, executor=None, market=None, fan_chart=False, fan_bins=512):
+    # Stops early once the standard error of the mean reaches tol (absolute)
+    # or rtol (relative to the mean), checked after every block of
+    # MONTE_CARLO_BLOCK runs. Blocks are folded in order, so results depend
+    # on the seed only, not on the chunk size or worker count. market is a
+    # paths.py model for random returns and FX; fan_chart keeps monthly
+    # percentile bands, with chunks capped at FAN_CHART_CHUNK paths.
+    executor = get_executor(executor)
+    seed = np.random.SeedSequence(seed).entropy
+    if fan_chart:
+        chunk_size = min(chunk_size, FAN_CHART_CHUNK)
+    chunks = monte_carlo_chunks(params, runs, seed, chunk_size, market, fan_chart)
+    stats = StreamingStats()
+    histogram = StreamingHistogram(bins)
+    fan = FanChart(int(params['years'] * 12), fan_bins) if fan_chart else None
+    history = []
+    converged = False
+
+    for wave in range(0, len(chunks), executor.workers):
+        for blocks in executor.map(operator.call, chunks[wave:wave + executor.workers]):
+            for values in blocks:
+                with span("monte_carlo.fold"):
+                    if fan is not None:
+                        values, net_worth = values
+                        fan.update(net_worth)
+                    stats.update(values)
+                    histogram.update(values)
+                history.append({
+                    'Runs': stats.count,
+                    'Mean': stats.mean,
+                    'Std Error': stats.std_error
+                })
+                if stats.count > 1:
+                    if tol is not None and stats.std_error <= tol:
+                        converged = True
+                    if rtol is not None and stats.std_error <= rtol * abs(stats.mean):
+                        converged = True
+                if converged:
+                    break
+            if on_chunk is not None:
+                on_chunk(stats, histogram)
+            if converged:
+                break
+        if converged:
+            break
+
+    return MonteCarloResult(seed, stats, histogram, pd.DataFrame(history), converged, fan)
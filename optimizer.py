@@ -0,0 +1,136 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from simulation import simulate_summary
+
+INV_PHI = (math.sqrt(5) - 1) / 2
+
+# Allocation knobs each strategy responds to
+STRATEGY_KNOBS = {
+    "B": ["percent_to_invest"],
+    "C": ["percent_to_invest", "moratorium_invest_pct"],
+    "D": ["moratorium_invest_pct"],
+    "E": ["threshold_pct"],
+    "H": ["percent_to_invest"],
+}
+# Search range (%) of each knob
+KNOB_BOUNDS = {
+    "percent_to_invest": (0, 100),
+    "moratorium_invest_pct": (0, 100),
+    "threshold_pct": (0, 100),
+}
+KNOB_LABELS = {
+    "percent_to_invest": "Investment %",
+    "moratorium_invest_pct": "Moratorium Investment %",
+    "threshold_pct": "Threshold %",
+}
+
+
+class EvaluationCache:
+    # Remembers every evaluated point so repeated probes are free;
+    # on_evaluation(cache) runs after every new point
+    def __init__(self, params, objective="final_net_worth", on_evaluation=None):
+        self.params = params
+        self.objective = objective
+        self.on_evaluation = on_evaluation
+        self.points = {}
+        self.hits = 0
+
+    def __call__(self, **knobs):
+        key = tuple(sorted((name, round(float(value), 6)) for name, value in knobs.items()))
+        if key in self.points:
+            self.hits += 1
+            return self.points[key]
+        test_params = self.params.copy()
+        test_params.update(knobs)
+        value = simulate_summary(test_params)[self.objective]
+        self.points[key] = value
+        if self.on_evaluation is not None:
+            self.on_evaluation(self)
+        return value
+
+    @property
+    def evaluations(self):
+        return len(self.points)
+
+    def trace(self):
+        rows = [dict(key, **{"Final Net Worth": value}) for key, value in self.points.items()]
+        frame = pd.DataFrame(rows)
+        knobs = [column for column in frame.columns if column != "Final Net Worth"]
+        return frame.sort_values(knobs).reset_index(drop=True).rename(columns=KNOB_LABELS)
+
+
+def golden_section_search(f, lo, hi, tol=0.1):
+    # Maximize a unimodal f on [lo, hi]
+    c = hi - INV_PHI * (hi - lo)
+    d = lo + INV_PHI * (hi - lo)
+    fc, fd = f(c), f(d)
+    while hi - lo > tol:
+        if fc >= fd:
+            hi, d, fd = d, c, fc
+            c = hi - INV_PHI * (hi - lo)
+            fc = f(c)
+        else:
+            lo, c, fc = c, d, fd
+            d = lo + INV_PHI * (hi - lo)
+            fd = f(d)
+    return (c, fc) if fc >= fd else (d, fd)
+
+
+def maximize_1d(f, lo, hi, step=10, tol=0.1):
+    # Coarse grid to bracket the best region, then golden-section inside it.
+    # The grid guards against the kinks around the loan payoff month that
+    # can make the objective non-unimodal over the full range.
+    grid = np.unique(np.append(np.arange(lo, hi, step), hi))
+    values = [f(x) for x in grid]
+    best = int(np.argmax(values))
+    x, fx = golden_section_search(f, grid[max(best - 1, 0)], grid[min(best + 1, len(grid) - 1)], tol)
+    if values[best] >= fx:
+        return grid[best], values[best]
+    return x, fx
+
+
+@timed("optimize_split")
+def optimize_split(params, step=10, tol=0.1, on_point=None):
+    # on_point(curve) sees the evaluated points so far
+    strategy = params.get("strategy", "B")
+    on_evaluation = None if on_point is None else lambda evaluate: on_point(evaluate.trace())
+    evaluate = EvaluationCache(dict(params, strategy=strategy), on_evaluation=on_evaluation)
+    maximize_1d(lambda pct: evaluate(percent_to_invest=pct), 0, 100, step, tol)
+    return evaluate.trace()
+
+
+@timed("optimize_parameters")
+def optimize_parameters(params, knobs=None, step=10, tol=0.1, max_rounds=5):
+    # Coordinate ascent: line-search one knob at a time, holding the others at
+    # their best values so far, until a full round stops improving
+    strategy = params.get("strategy", "B")
+    knobs = STRATEGY_KNOBS.get(strategy, []) if knobs is None else list(knobs)
+    if not knobs:
+        raise ValueError(f"Strategy {strategy} has no allocation knobs to optimize")
+
+    evaluate = EvaluationCache(dict(params, strategy=strategy))
+    best = {name: float(params.get(name, 100 if name == "moratorium_invest_pct" else 0)) for name in knobs}
+    best_value = evaluate(**best)
+    for _ in range(max_rounds):
+        previous = best_value
+        for name in knobs:
+            lo, hi = KNOB_BOUNDS[name]
+            others = {key: value for key, value in best.items() if key != name}
+            x, fx = maximize_1d(lambda value: evaluate(**others, **{name: value}), lo, hi, step, tol)
+            if fx > best_value:
+                best[name], best_value = float(x), fx
+        if best_value - previous <= abs(previous) * 1e-12:
+            break
+
+    return {
+        "strategy": strategy,
+        "best": best,
+        "final_net_worth": best_value,
+        "evaluations": evaluate.evaluations,
+        "cache_hits": evaluate.hits,
+        "trace": evaluate.trace(),
+    }
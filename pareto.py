@@ -0,0 +1,171 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count, timed
+from optimizer import KNOB_BOUNDS, KNOB_LABELS, STRATEGY_KNOBS
+from simulation import simulate_batch
+from strategies import STRATEGY_REGISTRY
+
+# Multi-objective view of the allocation choice: every strategy and knob
+# setting on a grid, scored on final net worth (max), months to clear the loan
+# (min, never cleared counts as infinitely late) and optionally the worst final
+# net worth over a few job loss scenarios (max). Candidates are ranked by
+# non-dominated sorting; rank 0 is the Pareto frontier.
+DEFAULT_JOB_LOSS_STARTS = (12, 24, 36)
+# Job loss settings for the worst case when params has none (the app's defaults)
+JOB_LOSS_DEFAULTS = {'job_loss_duration': 6, 'income_recovery_rate': 50}
+
+
+def pareto_strategies():
+    # Strategy G's random splits have no fixed configuration to recommend
+    return [code for code in STRATEGY_REGISTRY if code != 'G']
+
+
+def _knob_values(knob, step):
+    low, high = KNOB_BOUNDS[knob]
+    return np.unique(np.append(np.arange(low, high, step), high))
+
+
+def candidate_grid(params, strategies=None, step=5):
+    # One row per strategy and combination of the knobs it responds to;
+    # knobs a strategy ignores keep their params value
+    parts = []
+    for code in strategies or pareto_strategies():
+        knobs = STRATEGY_KNOBS.get(code, [])
+        axes = np.meshgrid(*[_knob_values(knob, step) for knob in knobs], indexing='ij')
+        part = {knob: axis.ravel() for knob, axis in zip(knobs, axes)}
+        size = len(axes[0].ravel()) if knobs else 1
+        for knob in KNOB_BOUNDS:
+            if knob not in part:
+                part[knob] = np.full(size, params[knob])
+        part['strategy'] = np.full(size, code, dtype=object)
+        parts.append(pd.DataFrame(part))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _simulate_candidates(params, grid, overrides=None, repeat=1):
+    # Final net worth and months to clear for every grid row, under each of
+    # `repeat` scenarios given by per-row overrides, as one batch
+    columns = dict(params)
+    columns.update({key: np.tile(grid[key].to_numpy(), repeat) for key in grid.columns})
+    columns.update(overrides or {})
+    summary, _ = simulate_batch(columns, size=len(grid) * repeat, seed=params.get('seed'))
+    return (summary['final_net_worth'].to_numpy().reshape(repeat, len(grid)),
+            summary['months_to_clear_loan'].to_numpy().reshape(repeat, len(grid)))
+
+
+def _front_bisect(fronts, dominated):
+    # First front that does not dominate the row; fronts dominating it form
+    # a prefix, as each member of a later front is dominated by an earlier one
+    low, high = 0, len(fronts)
+    while low < high:
+        middle = (low + high) // 2
+        if dominated(middle):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def non_dominated_sort(objectives, maximize=None):
+    # Dominance rank of each row of an (n, k) objective matrix, 0 for the
+    # Pareto frontier; objectives are minimized unless flagged in maximize.
+    # Efficient non-dominated sort with binary search (Zhang et al., 2015):
+    # distinct rows are visited in lexicographic order, so a row can only be
+    # dominated by rows already placed, and no pairwise comparison is needed.
+    # Duplicate rows share a rank.
+    values = np.asarray(objectives, dtype=float)
+    if values.ndim != 2:
+        raise ValueError("objectives must be an (n, k) matrix")
+    if maximize is not None:
+        values = np.where(np.asarray(maximize, dtype=bool), -values, values)
+    if not len(values):
+        return np.zeros(0, dtype=np.int64)
+    unique, inverse = np.unique(values, axis=0, return_inverse=True)
+    ranks = np.empty(len(unique), dtype=np.int64)
+
+    if unique.shape[1] <= 2:
+        # Two objectives: a front dominates a later row iff its smallest
+        # second objective so far is <= the row's; those minima increase
+        # with the front index, so bisect on them
+        lowest = []
+        for i, value in enumerate(unique[:, -1]):
+            rank = bisect.bisect_right(lowest, value)
+            if rank == len(lowest):
+                lowest.append(value)
+            else:
+                lowest[rank] = value
+            ranks[i] = rank
+    elif unique.shape[1] == 3:
+        # Three objectives: a front dominates a later row iff a member is <=
+        # in the last two, so each front keeps the staircase of its minimal
+        # (second, third) pairs, sorted by second with third decreasing
+        stairs = []
+        for i, (_, second, third) in enumerate(unique):
+            def dominated(front):
+                seconds, thirds = stairs[front]
+                j = bisect.bisect_right(seconds, second) - 1
+                return j >= 0 and thirds[j] <= third
+            rank = _front_bisect(stairs, dominated)
+            if rank == len(stairs):
+                stairs.append(([], []))
+            seconds, thirds = stairs[rank]
+            start = end = bisect.bisect_left(seconds, second)
+            while end < len(seconds) and thirds[end] >= third:
+                end += 1
+            seconds[start:end] = [second]
+            thirds[start:end] = [third]
+            ranks[i] = rank
+    else:
+        fronts = []  # [members array, member count]
+        for i, row in enumerate(unique):
+            def dominated(front):
+                members, size = fronts[front]
+                # Earlier distinct rows that are <= everywhere dominate
+                return bool(np.all(members[:size] <= row, axis=1).any())
+            rank = _front_bisect(fronts, dominated)
+            if rank == len(fronts):
+                fronts.append([np.empty((16, unique.shape[1])), 0])
+            members, size = fronts[rank]
+            if size == len(members):
+                members = fronts[rank][0] = np.concatenate([members, np.empty_like(members)])
+            members[size] = row
+            fronts[rank][1] = size + 1
+            ranks[i] = rank
+    return ranks[inverse.ravel()]
+
+
+@timed("pareto_frontier")
+def pareto_frontier(params, strategies=None, step=5, job_loss_starts=None):
+    # Every candidate with its objectives and dominance rank (0 = frontier).
+    # job_loss_starts adds the worst final net worth over job losses starting
+    # in those months, using params' duration and recovery when set
+    grid = candidate_grid(params, strategies, step)
+    count("pareto_candidates", len(grid))
+    net_worth, cleared = _simulate_candidates(params, grid)
+    result = pd.DataFrame({'Strategy': grid['strategy']})
+    for knob, label in KNOB_LABELS.items():
+        responds = np.array([knob in STRATEGY_KNOBS.get(code, []) for code in grid['strategy']], dtype=bool)
+        result[label] = np.where(responds, grid[knob].to_numpy(dtype=float), np.nan)
+    result['Final Net Worth'] = net_worth[0]
+    result['Months to Clear'] = cleared[0]
+    objectives = [net_worth[0], np.nan_to_num(cleared[0], nan=np.inf)]
+    maximize = [True, False]
+
+    if job_loss_starts:
+        starts = np.asarray(job_loss_starts)
+        overrides = {
+            'enable_job_loss': True,
+            'job_loss_start': np.repeat(starts, len(grid)),
+        }
+        for key, default in JOB_LOSS_DEFAULTS.items():
+            overrides[key] = default if params.get(key) is None else params[key]
+        scenario_net_worth, _ = _simulate_candidates(params, grid, overrides, len(starts))
+        result['Worst-Case Net Worth'] = scenario_net_worth.min(axis=0)
+        objectives.append(result['Worst-Case Net Worth'].to_numpy())
+        maximize.append(True)
+
+    result['Rank'] = non_dominated_sort(np.column_stack(objectives), maximize)
+    return result
@@ -0,0 +1,94 @@
+import numpy as np
+
+# Random monthly investment growth and USD->INR factors. The means come from
+# each scenario's own inputs (1 + investment_rate_annual / 12 and the FX
+# drift factor), so a model only adds volatility, correlation and regimes.
+# A model's stepper(p, rng) returns step(month) -> (growth, fx_factor), one
+# value per row for the next month, so paths are drawn as the simulation
+# advances and never held in memory in full.
+
+
+def _correlated_normals(rng, n, correlation):
+    # Standard normal return and FX shocks with the given correlation
+    z = rng.standard_normal((2, n))
+    return z[0], correlation * z[0] + np.sqrt(1 - correlation ** 2) * z[1]
+
+
+class LognormalMarket:
+    # Monthly log-returns are normal with annual volatilities return_vol and
+    # fx_vol; drifts are set so expected monthly factors match the
+    # deterministic model
+    def __init__(self, return_vol=0.15, fx_vol=0.05, correlation=0.0):
+        if not -1 <= correlation <= 1:
+            raise ValueError("correlation must be between -1 and 1")
+        self.return_vol = return_vol
+        self.fx_vol = fx_vol
+        self.correlation = correlation
+
+    def stepper(self, p, rng):
+        n = len(p['months'])
+        return_sd = self.return_vol / np.sqrt(12)
+        fx_sd = self.fx_vol / np.sqrt(12)
+        log_growth = np.log1p(p['investment_rate_annual'] / 12) - return_sd ** 2 / 2
+        log_fx = np.log(p['fx_factor']) - fx_sd ** 2 / 2
+
+        def step(month):
+            return_shock, fx_shock = _correlated_normals(rng, n, self.correlation)
+            return np.exp(log_growth + return_sd * return_shock), np.exp(log_fx + fx_sd * fx_shock)
+        return step
+
+
+class RegimeSwitchingMarket:
+    # Markov chain over market regimes, each with its own annual return mean
+    # and volatility (the scenario's investment_rate_annual is not used).
+    # transition[i][j] is the monthly chance of moving from regime i to j;
+    # every path starts in regime 0.
+    def __init__(self, regimes=((0.15, 0.12), (-0.10, 0.30)), transition=((0.97, 0.03), (0.15, 0.85)),
+                 fx_vol=0.05, correlation=0.0):
+        regimes = np.asarray(regimes, dtype=float)
+        transition = np.asarray(transition, dtype=float)
+        if transition.shape != (len(regimes), len(regimes)) or not np.allclose(transition.sum(axis=1), 1):
+            raise ValueError("transition must be a square matrix over the regimes with rows summing to 1")
+        if not -1 <= correlation <= 1:
+            raise ValueError("correlation must be between -1 and 1")
+        self.regimes = regimes.tolist()
+        self.transition = transition.tolist()
+        self.fx_vol = fx_vol
+        self.correlation = correlation
+
+    def stepper(self, p, rng):
+        n = len(p['months'])
+        regimes = np.asarray(self.regimes)
+        return_sd = regimes[:, 1] / np.sqrt(12)
+        log_growth = np.log1p(regimes[:, 0] / 12) - return_sd ** 2 / 2
+        cumulative = np.cumsum(self.transition, axis=1)
+        cumulative[:, -1] = 1.0
+        fx_sd = self.fx_vol / np.sqrt(12)
+        log_fx = np.log(p['fx_factor']) - fx_sd ** 2 / 2
+        state = np.zeros(n, dtype=np.int64)
+
+        def step(month):
+            if month > 1:
+                u = rng.random(n)
+                state[:] = (u[:, None] >= cumulative[state]).sum(axis=1)
+            return_shock, fx_shock = _correlated_normals(rng, n, self.correlation)
+            growth = np.exp(log_growth[state] + return_sd[state] * return_shock)
+            return growth, np.exp(log_fx + fx_sd * fx_shock)
+        return step
+
+
+MARKET_MODELS = {
+    'lognormal': LognormalMarket,
+    'regime': RegimeSwitchingMarket,
+}
+
+
+def market_model(kind, **settings):
+    if kind not in MARKET_MODELS:
+        raise ValueError(f"Unknown market model {kind!r}, expected one of {sorted(MARKET_MODELS)}")
+    return MARKET_MODELS[kind](**settings)
+
+
+def model_settings(model):
+    # Plain description of a model, used in cache keys
+    return dict(vars(model), kind=type(model).__name__)
@@ -0,0 +1,199 @@
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+# Monthly results for many paths: one contiguous (paths, months) array per
+# column, float32 by default (half the memory of the float64 DataFrame). With
+# a directory the columns are .npy files memory-mapped from disk, so a store
+# can outgrow RAM and its NumPy export is the files themselves. Paths shorter
+# than `months` are NaN-padded and their padding is left out of exports.
+# Exports stream blocks of EXPORT_CHUNK_ROWS long-format rows, each built
+# from views of the column arrays, so no full-size table is ever built.
+EXPORT_CHUNK_ROWS = 200_000
+META_FILE = "store.json"
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+class ResultStore(Mapping):
+    def __init__(self, paths, months, columns, dtype=np.float32, directory=None, labels=None):
+        self.paths = paths
+        self.months = months
+        self.columns = list(columns)
+        self.dtype = np.dtype(dtype)
+        self.directory = directory
+        # Per-path id columns written in front of Month in exports
+        self.labels = {name: np.asarray(values) for name, values in (labels or {}).items()}
+        self.horizons = np.full(paths, months, dtype=np.int64)
+        self._data = {}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        for name in self.columns:
+            if directory is None:
+                self._data[name] = np.full((paths, months), np.nan, self.dtype)
+            else:
+                array = np.lib.format.open_memmap(self._file(name), mode="w+", dtype=self.dtype,
+                                                  shape=(paths, months))
+                array[:] = np.nan
+                self._data[name] = array
+
+    @classmethod
+    def from_result(cls, result, dtype=np.float64):
+        # Single-path store holding a SimulationResult's monthly columns
+        if result.columns is None:
+            raise ValueError("Summary-only result has no monthly table; rerun with summary_only=False")
+        months = len(result.columns['Net Worth'])
+        store = cls(1, months, result.columns, dtype)
+        store.write([0], {name: values[None, :] for name, values in result.columns.items()})
+        return store
+
+    @classmethod
+    def open(cls, directory, mode="r"):
+        # Reopens a memory-mapped store written with directory=...
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        store = cls.__new__(cls)
+        store.columns = meta['columns']
+        store.dtype = np.dtype(meta['dtype'])
+        store.directory = directory
+        store._data = {name: np.load(store._file(name), mmap_mode=mode) for name in store.columns}
+        store.paths, store.months = store._data[store.columns[0]].shape
+        store.horizons = np.load(os.path.join(directory, "_horizons.npy"))
+        store.labels = {name: np.load(os.path.join(directory, f"_label_{name}.npy"), allow_pickle=False)
+                        for name in meta['labels']}
+        return store
+
+    def _file(self, name, directory=None):
+        return os.path.join(directory or self.directory, f"{name}.npy")
+
+    def __getitem__(self, name):
+        return self._data[name]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._data.values())
+
+    def write(self, rows, columns, horizons=None):
+        # columns maps names to (len(rows), m) arrays for months 1..m; months
+        # past a row's horizon are stored as NaN
+        if horizons is not None:
+            self.horizons[rows] = horizons
+        horizons = self.horizons[rows]
+        padding = None
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if values.shape[1] > self.months:
+                raise ValueError(f"{values.shape[1]} months do not fit a store of {self.months}")
+            if padding is None:
+                padding = np.arange(values.shape[1])[None, :] >= horizons[:, None]
+            block = values
+            if padding.any():
+                # Only padded blocks need a copy to blank out
+                block = values.astype(self.dtype)
+                block[padding] = np.nan
+            self._data[name][rows, :values.shape[1]] = block
+
+    def flush(self):
+        # Makes a memory-mapped store's directory complete for open()
+        if self.directory is not None:
+            self.to_npy(self.directory)
+
+    def to_frame(self, path=0):
+        # One path's monthly table, indexed by Month like simulate_strategy's
+        months = int(self.horizons[path])
+        index = pd.RangeIndex(1, months + 1, name="Month")
+        return pd.DataFrame({name: self._data[name][path, :months] for name in self.columns}, index=index)
+
+    def _id_columns(self):
+        if self.labels:
+            return self.labels
+        return {'Path': np.arange(self.paths)} if self.paths > 1 else {}
+
+    def iter_blocks(self, chunk_rows=EXPORT_CHUNK_ROWS):
+        # Long-format blocks {id columns, Month, value columns} of about
+        # chunk_rows rows; value columns are views wherever no padding is cut
+        ids = self._id_columns()
+        step = max(chunk_rows // max(self.months, 1), 1)
+        for start in range(0, self.paths, step):
+            stop = min(start + step, self.paths)
+            n = stop - start
+            kept = None
+            if (self.horizons[start:stop] < self.months).any():
+                kept = (np.arange(self.months)[None, :] < self.horizons[start:stop, None]).ravel()
+            block = {name: np.repeat(values[start:stop], self.months) for name, values in ids.items()}
+            block['Month'] = np.tile(np.arange(1, self.months + 1), n)
+            if kept is not None:
+                block = {name: values[kept] for name, values in block.items()}
+            for name in self.columns:
+                values = self._data[name][start:stop].reshape(-1)
+                block[name] = values if kept is None else values[kept]
+            yield block
+
+    def to_csv(self, target, chunk_rows=EXPORT_CHUNK_ROWS, header=True):
+        # target is a path or a binary file object
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, "wb") as f:
+                return self.to_csv(f, chunk_rows, header)
+        arrow = _arrow()
+        if header:
+            target.write((",".join([*self._id_columns(), 'Month', *self.columns]) + "\n").encode())
+        for block in self.iter_blocks(chunk_rows):
+            if arrow is None:
+                target.write(pd.DataFrame(block).to_csv(index=False, header=False).encode())
+            else:
+                options = arrow.csv.WriteOptions(include_header=False, quoting_style="needed")
+                arrow.csv.write_csv(arrow.table(block), target, options)
+        return target
+
+    def to_parquet(self, target, chunk_rows=EXPORT_CHUNK_ROWS):
+        # One row group per block; target is a path or a binary file object
+        arrow = _arrow()
+        if arrow is None:
+            raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+        writer = None
+        for block in self.iter_blocks(chunk_rows):
+            table = arrow.table(block)
+            if writer is None:
+                # Dictionary encoding only pays off for the repeated id columns
+                writer = arrow.parquet.ParquetWriter(target, table.schema,
+                                                     use_dictionary=[*self._id_columns(), 'Month'])
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+        return target
+
+    def to_npy(self, directory):
+        # One (paths, months) .npy file per column, plus the horizons and
+        # labels, readable with ResultStore.open or np.load(mmap_mode="r")
+        os.makedirs(directory, exist_ok=True)
+        same = self.directory is not None and os.path.samefile(directory, self.directory)
+        for name, array in self._data.items():
+            if same:
+                array.flush()
+            else:
+                np.save(self._file(name, directory), array)
+        np.save(os.path.join(directory, "_horizons.npy"), self.horizons)
+        for name, values in self.labels.items():
+            if values.dtype == object:
+                values = values.astype(str)
+            np.save(os.path.join(directory, f"_label_{name}.npy"), values)
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump({'columns': self.columns, 'dtype': self.dtype.str, 'labels': list(self.labels)}, f)
+        return directory
@@ -0,0 +1,131 @@
+import numbers
+
+import numpy as np
+import pandas as pd
+
+from cache import SCENARIO_FIELDS
+from instrumentation import timed
+from simulation import INERT_FIELDS, simulate_batch
+
+# Whole-month inputs move by one unit instead of a percentage
+DISCRETE_FIELDS = {'years': 1, 'moratorium_months': 0, 'graduation_month': 1, 'loan_term_months': 1,
+                   'job_loss_start': 1, 'job_loss_duration': 0}
+# Inputs in percent (0-100) and as fractions (0-1); used to bound the
+# perturbation and to pick a step when the base value is zero
+PERCENT_FIELDS = ['percent_to_invest', 'threshold_pct', 'moratorium_invest_pct', 'income_recovery_rate']
+FRACTION_FIELDS = ['us_tax_rate', 'indian_tax_rate']
+RATE_FIELDS = ['interest_rate_loan', 'investment_rate_annual', 'inflation_rate', 'fx_drift_rate']
+EXCLUDED_FIELDS = ['seed', *INERT_FIELDS]
+# Span swept by the 2-D grid when an input's base value is zero, about the
+# app's input ranges
+ZERO_RANGES = {
+    'moratorium_months': (0, 24),
+    'job_loss_duration': (0, 24),
+    'gross_annual_salary_usd': (0, 200_000),
+    'us_tax_rate': (0, 0.4),
+    'monthly_expenses_usd': (0, 5_000),
+    'loan_amount_inr': (0, 5_000_000),
+    'interest_rate_loan': (0, 0.2),
+    'emi_inr': (0, 50_000),
+    'investment_rate_annual': (0, 0.5),
+    'usd_to_inr_rate': (0, 100),
+    'inflation_rate': (0, 0.2),
+    'fx_drift_rate': (-0.1, 0.1),
+}
+
+
+def sensitivity_parameters(params):
+    # Numeric inputs that can affect the result with the current toggles
+    # (inputs the simulation never reads would only add zero bars)
+    disabled = {field for flag, fields in SCENARIO_FIELDS.items() if not params.get(flag) for field in fields}
+    return [key for key, value in params.items()
+            if isinstance(value, numbers.Real) and not isinstance(value, bool)
+            and key not in disabled and key not in EXCLUDED_FIELDS]
+
+
+def _clamp(key, value, low, high):
+    # Keeps percent and fraction inputs in range, and non-negative inputs
+    # non-negative
+    if key in PERCENT_FIELDS:
+        return max(low, 0), min(high, 100)
+    if key in FRACTION_FIELDS:
+        return max(low, 0), min(high, 1)
+    if key not in RATE_FIELDS and value >= 0:
+        return max(low, 0), high
+    return low, high
+
+
+def _perturb(key, value, delta):
+    if key in DISCRETE_FIELDS:
+        return max(value - 1, DISCRETE_FIELDS[key]), value + 1
+    if value == 0:
+        step = 1.0 if key in PERCENT_FIELDS else 0.01 if key in FRACTION_FIELDS + RATE_FIELDS else 1.0
+    else:
+        step = abs(value) * delta
+    return _clamp(key, value, value - step, value + step)
+
+
+def grid_values(key, value, spread, points=11):
+    # Values swept along one axis of sensitivity_grid: value ± spread
+    # (relative), clamped like the tornado's perturbations; a zero value has
+    # nothing to scale, so the key's ZERO_RANGES span is swept instead
+    if value == 0:
+        low, high = (0, 100) if key in PERCENT_FIELDS else ZERO_RANGES.get(key, (0, 1))
+    else:
+        low, high = _clamp(key, value, value - abs(value) * spread, value + abs(value) * spread)
+    values = np.linspace(low, high, points)
+    if key in DISCRETE_FIELDS:
+        values = np.unique(np.maximum(np.round(values), DISCRETE_FIELDS[key]))
+    return values
+
+
+def _elasticity(y_low, y_high, y_base, x_low, x_high, x_base):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((y_high - y_low) / y_base) / ((x_high - x_low) / x_base)
+
+
+@timed("sensitivity_analysis")
+def sensitivity_analysis(params, delta=0.1, keys=None, seed=0):
+    # Moves each numeric input down and up (by `delta` relative, or one unit
+    # for whole-month inputs) and evaluates all 2K+1 scenarios in one batch
+    keys = sensitivity_parameters(params) if keys is None else list(keys)
+    rows = [dict(params)]
+    tested = []
+    for key in keys:
+        low, high = _perturb(key, params[key], delta)
+        if low == high:
+            continue
+        tested.append((key, params[key], low, high))
+        rows.append(dict(params, **{key: low}))
+        rows.append(dict(params, **{key: high}))
+
+    summary, _ = simulate_batch(rows, seed=seed, common_splits=True)
+    net_worth = summary['final_net_worth'].to_numpy()
+    payoff = summary['months_to_clear_loan'].to_numpy()
+
+    table = pd.DataFrame(tested, columns=['Parameter', 'Base Value', 'Low Value', 'High Value'])
+    table['Net Worth (Low)'] = net_worth[1::2]
+    table['Net Worth (High)'] = net_worth[2::2]
+    table['Net Worth Swing'] = (table['Net Worth (High)'] - table['Net Worth (Low)']).abs()
+    table['Net Worth Elasticity'] = _elasticity(table['Net Worth (Low)'], table['Net Worth (High)'], net_worth[0],
+                                                table['Low Value'], table['High Value'], table['Base Value'])
+    table['Payoff Month (Low)'] = payoff[1::2]
+    table['Payoff Month (High)'] = payoff[2::2]
+    table['Payoff Elasticity'] = _elasticity(table['Payoff Month (Low)'], table['Payoff Month (High)'], payoff[0],
+                                             table['Low Value'], table['High Value'], table['Base Value'])
+    table = table.sort_values('Net Worth Swing', ascending=False, ignore_index=True)
+
+    base = {'final_net_worth': net_worth[0], 'months_to_clear_loan': payoff[0]}
+    return base, table
+
+
+@timed("sensitivity_grid")
+def sensitivity_grid(params, x_key, x_values, y_key, y_values, metric='final_net_worth', seed=0):
+    # Metric over every (x, y) pair, one batch; rows are y values, columns x values
+    x_grid, y_grid = np.meshgrid(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))
+    table = {key: value for key, value in params.items()}
+    table[x_key] = x_grid.ravel()
+    table[y_key] = y_grid.ravel()
+    summary, _ = simulate_batch(table, seed=seed, common_splits=True)
+    return pd.DataFrame(summary[metric].to_numpy().reshape(x_grid.shape),
+                        index=pd.Index(y_values, name=y_key), columns=pd.Index(x_values, name=x_key))
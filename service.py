@@ -0,0 +1,515 @@
+import argparse
+import json
+import math
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from bulk_runner import BOOLEAN_FIELDS, BOUNDS, DEFAULTS, REQUIRED_FIELDS, RISK_TYPES
+from cache import cached_optimize_investment_split, cached_run_monte_carlo
+from montecarlo import FAN_CHART_PERCENTILES
+from paths import MARKET_MODELS, market_model
+from simulation import INERT_FIELDS, closed_form_summary, simulate_batch, simulate_strategy, simulate_summary
+from strategies import STRATEGY_REGISTRY
+
+# Local JSON service over the simulator. POST bodies carry a `params` object
+# with the app's keys (validated here, bulk runner defaults and bounds);
+# responses are JSON. Summaries that need the monthly loop are coalesced
+# across requests into simulate_batch calls; everything else heavier than a
+# closed-form summary runs on a small bounded pool, and a request that finds
+# the pool or the batch queue full gets 503.
+#
+#   POST /simulate    {"params": {...}, "monthly": false}
+#   POST /compare     {"params": {...}, "strategies": ["A", "B", ...]}
+#   POST /optimize    {"params": {...}, "step": 5, "method": "grid" | "golden", "tol": 0.1}
+#   POST /montecarlo  {"params": {...}, "runs": 1000, "seed": 7, "rtol": null,
+#                      "market": null | {"kind": "lognormal" | "regime", ...}}
+#   GET  /metrics, /health
+MAX_BODY_BYTES = 1 << 20
+MAX_RUNS = 1_000_000
+# Tighter than the bulk runner's bounds: one request must not tie up the
+# batcher (a row costs one step per month) or overflow the balances
+MAX_YEARS = 50
+MAX_AMOUNT = 1e12
+SERVICE_BOUNDS = dict(
+    BOUNDS,
+    years=(1, MAX_YEARS),
+    moratorium_months=(0, MAX_YEARS * 12),
+    job_loss_start=(0, MAX_YEARS * 12),
+    job_loss_duration=(0, MAX_YEARS * 12),
+    gross_annual_salary_usd=(0, MAX_AMOUNT),
+    monthly_expenses_usd=(0, MAX_AMOUNT),
+    loan_amount_inr=(0, MAX_AMOUNT),
+    emi_inr=(0, MAX_AMOUNT),
+    usd_to_inr_rate=(0, MAX_AMOUNT),
+    interest_rate_loan=(0, 1),
+    investment_rate_annual=(-1, 1),
+    inflation_rate=(-1, 1),
+    fx_drift_rate=(-1, 1),
+)
+NUMBER_FIELDS = REQUIRED_FIELDS + [key for key in DEFAULTS if key not in BOOLEAN_FIELDS and key != 'risk_type']
+KNOWN_FIELDS = set(NUMBER_FIELDS) | set(BOOLEAN_FIELDS) | set(INERT_FIELDS) | {'risk_type', 'strategy', 'seed'}
+# Every validated params dict going to the batcher has these
+BATCH_FIELDS = NUMBER_FIELDS + BOOLEAN_FIELDS + ['risk_type', 'strategy']
+LATENCY_SAMPLES = 4096
+THROUGHPUT_WINDOW = 10.0
+
+
+class ValidationError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class Overloaded(Exception):
+    pass
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_params(payload):
+    # A params dict ready for the simulator, or ValidationError listing every
+    # problem; missing optional fields take the bulk runner's defaults
+    if not isinstance(payload, dict):
+        raise ValidationError(["params must be a JSON object"])
+    errors = []
+    unknown = sorted(set(payload) - KNOWN_FIELDS)
+    if unknown:
+        errors.append(f"unknown fields: {', '.join(unknown)}")
+    params = {}
+    for field in NUMBER_FIELDS + INERT_FIELDS:
+        value = payload.get(field)
+        if value is None:
+            if field in REQUIRED_FIELDS:
+                errors.append(f"missing {field}")
+            elif field in DEFAULTS:
+                params[field] = DEFAULTS[field]
+            continue
+        if not _is_number(value):
+            errors.append(f"{field} must be a number")
+            continue
+        low, high = SERVICE_BOUNDS.get(field, (None, None))
+        if low is not None and value < low:
+            errors.append(f"{field} below {low:g}")
+        if high is not None and value > high:
+            errors.append(f"{field} above {high:g}")
+        params[field] = value
+    # The monthly loop counts whole years of months
+    if _is_number(params.get('years')):
+        if float(params['years']).is_integer():
+            params['years'] = int(params['years'])
+        else:
+            errors.append("years must be a whole number")
+
+    for field in BOOLEAN_FIELDS:
+        value = payload.get(field)
+        if value is None:
+            params[field] = DEFAULTS[field]
+        elif isinstance(value, bool):
+            params[field] = value
+        else:
+            errors.append(f"{field} must be true or false")
+    params['risk_type'] = payload.get('risk_type') or DEFAULTS['risk_type']
+    if params['risk_type'] not in RISK_TYPES:
+        errors.append(f"risk_type must be one of {RISK_TYPES}")
+    if 'strategy' in payload:
+        params['strategy'] = payload['strategy']
+        if params['strategy'] not in STRATEGY_REGISTRY:
+            errors.append(f"unknown strategy {params['strategy']!r}, registered: {sorted(STRATEGY_REGISTRY)}")
+    seed = payload.get('seed')
+    if seed is not None and not _is_integer(seed):
+        errors.append("seed must be an integer")
+    params['seed'] = seed
+    if errors:
+        raise ValidationError(errors)
+    return params
+
+
+def _numbers(value):
+    # A number or a (nested) list of numbers, as market settings take
+    if isinstance(value, list):
+        return bool(value) and all(_numbers(item) for item in value)
+    return _is_number(value)
+
+
+def validate_market(settings):
+    # Model settings as keyword arguments, or ValidationError; the models
+    # themselves check shapes and ranges when built
+    errors = [f"market {key} must be a number or a list of numbers"
+              for key, value in settings.items() if key != 'kind' and not _numbers(value)]
+    errors += [f"market {key} must not be negative" for key, value in settings.items()
+               if key.endswith('_vol') and _is_number(value) and value < 0]
+    if errors:
+        raise ValidationError(errors)
+    return {key: value for key, value in settings.items() if key != 'kind'}
+
+
+def _option(body, key, default, check, message):
+    value = body.get(key, default)
+    if value is not None and not check(value):
+        raise ValidationError([f"{key} {message}"])
+    return value
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _batchable(params):
+    # Strategy G draws its splits from a private random stream per run, so
+    # only the scalar engine reproduces a seeded G run
+    return params.get('strategy') != 'G'
+
+
+class MicroBatcher:
+    # Summary requests from many handler threads, evaluated together: a batch
+    # closes at max_batch rows or max_wait seconds after its first request
+    def __init__(self, max_batch=512, max_wait=0.002, max_queue=8192):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue(max_queue)
+        self.batches = 0
+        self.rows = 0
+        self._thread = threading.Thread(target=self._loop, name="sim-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, params):
+        future = Future()
+        try:
+            self.queue.put_nowait((params, future))
+        except queue.Full:
+            raise Overloaded("batch queue is full") from None
+        return future
+
+    def close(self):
+        self.queue.put(None)
+        self._thread.join()
+
+    def _loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._run(batch)
+                    return
+                batch.append(item)
+            self._run(batch)
+
+    def _run(self, batch):
+        try:
+            # Column arrays skip the list-of-dicts DataFrame build
+            columns = {key: [params[key] for params, _ in batch] for key in BATCH_FIELDS}
+            summary, _ = simulate_batch(columns)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        for (_, future), (net_worth, loan, investment, cleared) in zip(batch, summary.to_numpy().tolist()):
+            future.set_result({
+                'final_net_worth': net_worth,
+                'final_loan_balance': loan,
+                'final_investment_balance': investment,
+                'months_to_clear_loan': "Not Cleared" if math.isnan(cleared) else int(cleared),
+            })
+
+
+class ServiceMetrics:
+    # Per-endpoint request counts and latency percentiles (over the last
+    # LATENCY_SAMPLES requests), plus overall throughput over a sliding window
+    def __init__(self):
+        self.started = time.time()
+        self.endpoints = {}
+        self.recent = deque()
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, status, seconds):
+        now = time.perf_counter()
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = {'requests': 0, 'errors': 0, 'rejected': 0,
+                                                    'latencies': deque(maxlen=LATENCY_SAMPLES)}
+            stats['requests'] += 1
+            stats['errors'] += status >= 400
+            stats['rejected'] += status == 503
+            stats['latencies'].append(seconds)
+            self.recent.append(now)
+            while self.recent and self.recent[0] < now - THROUGHPUT_WINDOW:
+                self.recent.popleft()
+
+    def snapshot(self):
+        now = time.perf_counter()
+        with self._lock:
+            while self.recent and self.recent[0] < now - THROUGHPUT_WINDOW:
+                self.recent.popleft()
+            window = min(THROUGHPUT_WINDOW, time.time() - self.started) or 1.0
+            endpoints = {}
+            for endpoint, stats in sorted(self.endpoints.items()):
+                latencies = np.fromiter(stats['latencies'], dtype=float) * 1000
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (math.nan,) * 3
+                endpoints[endpoint] = {
+                    'requests': stats['requests'], 'errors': stats['errors'], 'rejected': stats['rejected'],
+                    'latency_ms': {'p50': p50, 'p95': p95, 'p99': p99,
+                                   'max': latencies.max() if len(latencies) else math.nan},
+                }
+            return {
+                'uptime_seconds': time.time() - self.started,
+                'requests': sum(stats['requests'] for stats in self.endpoints.values()),
+                'throughput_rps': len(self.recent) / window,
+                'endpoints': endpoints,
+            }
+
+
+class SimulationService:
+    # Transport-independent part of the service: dispatch(method, path, body)
+    # returns (status, payload)
+    def __init__(self, workers=4, max_pending=16, max_batch=512, max_wait=0.002, max_queue=8192, timeout=120):
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="sim-service")
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+        self.batcher = MicroBatcher(max_batch, max_wait, max_queue)
+        self.metrics = ServiceMetrics()
+        self.timeout = timeout
+        self.routes = {
+            ('POST', '/simulate'): self.simulate,
+            ('POST', '/compare'): self.compare,
+            ('POST', '/optimize'): self.optimize,
+            ('POST', '/montecarlo'): self.monte_carlo,
+            ('GET', '/metrics'): self.metrics_report,
+            ('GET', '/health'): self.health,
+        }
+
+    def close(self):
+        self.batcher.close()
+        self.pool.shutdown(wait=True)
+
+    def dispatch(self, method, path, body=None):
+        start = time.perf_counter()
+        route = self.routes.get((method, path))
+        if route is None:
+            allowed = any(route_path == path for _, route_path in self.routes)
+            status, payload = (405, {'error': f"{method} not allowed"}) if allowed else (404, {'error': "not found"})
+        else:
+            try:
+                if method == 'POST' and not isinstance(body, dict):
+                    raise ValidationError(["request body must be a JSON object"])
+                status, payload = 200, route(body)
+            except ValidationError as e:
+                status, payload = 400, {'error': "invalid request", 'details': e.errors}
+            except Overloaded as e:
+                status, payload = 503, {'error': f"overloaded: {e}"}
+            except FutureTimeout:
+                status, payload = 504, {'error': f"timed out after {self.timeout}s"}
+            except Exception as e:
+                status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+        self.metrics.record(path if route is not None else "other", status, time.perf_counter() - start)
+        return status, _jsonable(payload)
+
+    def _offload(self, fn, *args, **kwargs):
+        # Runs fn on the pool; with every worker busy and max_pending
+        # requests already waiting, fails fast instead of queueing
+        if not self.slots.acquire(blocking=False):
+            raise Overloaded("all workers are busy")
+        future = self.pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def _summary(self, params):
+        # Closed-form summaries take microseconds and are answered in the
+        # handler thread; the rest need the monthly loop and are batched
+        summary = closed_form_summary(params)
+        if summary is not None:
+            future = Future()
+            future.set_result(summary)
+            return future
+        if _batchable(params):
+            return self.batcher.submit(params)
+        return self._offload(simulate_summary, params)
+
+    def _params(self, body, strategy_required=True):
+        params = validate_params(body.get('params'))
+        if strategy_required and 'strategy' not in params:
+            raise ValidationError(["missing strategy"])
+        return params
+
+    def simulate(self, body):
+        params = self._params(body)
+        monthly = _option(body, 'monthly', False, lambda value: isinstance(value, bool), "must be true or false")
+        if not monthly:
+            return {'summary': self._summary(params).result(self.timeout)}
+        result = self._offload(simulate_strategy, params).result(self.timeout)
+        return {'summary': result.summary, 'monthly': {name: values.tolist() for name, values in result.columns.items()}}
+
+    def compare(self, body):
+        params = self._params(body, strategy_required=False)
+        strategies = _option(body, 'strategies', sorted(STRATEGY_REGISTRY),
+                             lambda value: isinstance(value, list) and value
+                             and all(code in STRATEGY_REGISTRY for code in value),
+                             f"must be a non-empty list of registered strategies {sorted(STRATEGY_REGISTRY)}")
+        futures = [self._summary(dict(params, strategy=code)) for code in strategies]
+        results = []
+        for code, future in zip(strategies, futures):
+            summary = future.result(self.timeout)
+            results.append({
+                "Strategy": code,
+                "Final Net Worth": summary["final_net_worth"],
+                "Loan Cleared In (Months)": summary["months_to_clear_loan"],
+                "Final Investment Balance": summary["final_investment_balance"],
+            })
+        return {'results': results}
+
+    def optimize(self, body):
+        params = self._params(body)
+        if params['strategy'] not in ("B", "C"):
+            raise ValidationError(["optimization supports strategies B and C"])
+        step = _option(body, 'step', 5, lambda value: _is_integer(value) and 1 <= value <= 100,
+                       "must be an integer from 1 to 100")
+        method = _option(body, 'method', "grid", lambda value: value in ("grid", "golden"),
+                         "must be 'grid' or 'golden'")
+        tol = _option(body, 'tol', 0.1, lambda value: _is_number(value) and value > 0, "must be a positive number")
+        curve = self._offload(cached_optimize_investment_split, params, step, method, tol).result(self.timeout)
+        best = curve.loc[curve["Final Net Worth"].idxmax()]
+        return {'curve': curve.to_dict(orient='records'), 'best': best.to_dict()}
+
+    def monte_carlo(self, body):
+        params = self._params(body, strategy_required=False)
+        runs = _option(body, 'runs', 1000, lambda value: _is_integer(value) and 1 <= value <= MAX_RUNS,
+                       f"must be an integer from 1 to {MAX_RUNS:,}")
+        seed = _option(body, 'seed', None, _is_integer, "must be an integer")
+        rtol = _option(body, 'rtol', None, lambda value: _is_number(value) and value > 0, "must be a positive number")
+        settings = _option(body, 'market', None, lambda value: isinstance(value, dict)
+                           and value.get('kind') in MARKET_MODELS,
+                           f"must be null or an object with kind in {sorted(MARKET_MODELS)}")
+        market = None
+        if settings is not None:
+            options = validate_market(settings)
+            try:
+                market = market_model(settings['kind'], **options)
+            except (TypeError, ValueError) as e:
+                raise ValidationError([f"market: {e}"]) from None
+        result = self._offload(cached_run_monte_carlo, params, runs, seed, rtol=rtol, market=market).result(
+            self.timeout)
+        return {
+            'runs': result.runs,
+            'converged': result.converged,
+            'summary': result.describe().to_dict(),
+            'percentiles': {f"P{q}": result.quantile(q / 100) for q in FAN_CHART_PERCENTILES},
+        }
+
+    def metrics_report(self, body=None):
+        report = self.metrics.snapshot()
+        report['batching'] = {
+            'batches': self.batcher.batches,
+            'rows': self.batcher.rows,
+            'mean_batch_size': self.batcher.rows / self.batcher.batches if self.batcher.batches else 0.0,
+            'queued': self.batcher.queue.qsize(),
+        }
+        report['workers'] = self.workers
+        return report
+
+    def health(self, body=None):
+        return {'status': "ok"}
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def do_GET(self):
+        self._respond(*self.server.service.dispatch('GET', self.path.split("?")[0]))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._respond(413, {'error': f"body larger than {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            self._respond(400, {'error': f"invalid JSON: {e}"})
+            return
+        self._respond(*self.server.service.dispatch('POST', self.path.split("?")[0], body))
+
+    def _respond(self, status, payload):
+        data = json.dumps(payload, allow_nan=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', "application/json")
+        self.send_header('Content-Length', str(len(data)))
+        if status == 503:
+            self.send_header('Retry-After', "1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class SimulationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+        self.verbose = verbose
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the simulator as a local JSON/HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4, help="threads for compare/optimize/Monte Carlo work")
+    parser.add_argument("--max-pending", type=int, default=16, help="requests that may wait for a worker before 503")
+    parser.add_argument("--max-batch", type=int, default=512, help="summaries per vectorized batch")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="how long a batch waits to fill up")
+    parser.add_argument("--max-queue", type=int, default=8192, help="queued summaries before 503")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    service = SimulationService(args.workers, args.max_pending, args.max_batch, args.max_wait_ms / 1000,
+                                args.max_queue)
+    server = SimulationServer((args.host, args.port), service, args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
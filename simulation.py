@@ -1,6 +1,13 @@
+import math
+import operator
 import pandas as pd
 import numpy as np
-import random
+from functools import partial
+
+from executors import get_executor
+from instrumentation import count, span, timed
+from result_store import ResultStore
+from strategies import STRATEGY_REGISTRY, get_policy, get_policy_class
 
 def calculate_monthly_savings(gross_annual_salary_usd, us_tax_rate, monthly_expenses_usd):
     monthly_income_after_tax = (gross_annual_salary_usd / 12) * (1 - us_tax_rate)
@@ -9,159 +16,605 @@ def calculate_monthly_savings(gross_annual_salary_usd, us_tax_rate, monthly_expe
 def apply_tax(value, annual_tax_rate):
     return value * (1 - annual_tax_rate)
 
-def simulate_strategy(params):
+# Inputs the app collects for display but the simulation never reads
+INERT_FIELDS = ['graduation_month', 'loan_term_months', 'indian_tax_rate']
+
+MONTHLY_COLUMNS = ['Loan Balance', 'Investment Balance', 'Net Worth', 'EMI', 'Invested', 'Extra Loan Payment']
+
+class SimulationResult:
+    # Monthly columns as preallocated arrays (None in summary-only mode); the
+    # DataFrame is only built when the monthly table is actually needed
+    __slots__ = ('summary', 'columns', '_frame')
+
+    def __init__(self, summary, columns=None):
+        self.summary = summary
+        self.columns = columns
+        self._frame = None
+
+    def to_frame(self):
+        if self.columns is None:
+            raise ValueError("Summary-only result has no monthly table; rerun with summary_only=False")
+        if self._frame is None:
+            count("dataframe_builds")
+            months = len(self.columns['Net Worth'])
+            index = pd.RangeIndex(1, months + 1, name="Month")
+            with span("dataframe_build"):
+                self._frame = pd.DataFrame({name: self.columns[name] for name in MONTHLY_COLUMNS}, index=index)
+        return self._frame
+
+    def __getstate__(self):
+        return self.summary, self.columns
+
+    def __setstate__(self, state):
+        self.summary, self.columns = state
+        self._frame = None
+
+    def __iter__(self):
+        # Keeps `df, summary = simulate_strategy(params)` working
+        yield self.to_frame() if self.columns is not None else None
+        yield self.summary
+
+class SimulationState:
+    # Everything the monthly loop carries from one month to the next, after
+    # `month` months; lets a run stop and resume without changing the result
+    __slots__ = ('month', 'loan_balance', 'investment_balance', 'fx_rate', 'expenses', 'months_to_clear',
+                 'policy_state')
+
+    def __init__(self, month, loan_balance, investment_balance, fx_rate, expenses, months_to_clear="Not Cleared",
+                 policy_state=None):
+        self.month = month
+        self.loan_balance = loan_balance
+        self.investment_balance = investment_balance
+        self.fx_rate = fx_rate
+        self.expenses = expenses
+        self.months_to_clear = months_to_clear
+        self.policy_state = policy_state
+
+    @classmethod
+    def initial(cls, params):
+        return cls(0, params['loan_amount_inr'], 0, params["usd_to_inr_rate"], params["monthly_expenses_usd"])
+
+    def summary(self):
+        return {
+            'final_net_worth': self.investment_balance - self.loan_balance,
+            'final_loan_balance': self.loan_balance,
+            'final_investment_balance': self.investment_balance,
+            'months_to_clear_loan': self.months_to_clear
+        }
+
+def empty_columns(params):
+    months = params['years'] * 12
+    columns = {name: np.empty(months) for name in MONTHLY_COLUMNS}
+    columns['EMI'] = np.full(months, params['emi_inr'])
+    return columns
+
+def _run_months(params, state, columns=None, checkpoints=None, checkpoint_every=12):
+    # Simulates the months after state.month up to the horizon and returns the
+    # final state; appends a state to `checkpoints` every checkpoint_every months
     months = params['years'] * 12
+    count("months_simulated", max(months - state.month, 0))
+    policy = get_policy(params)
+    if state.policy_state is not None:
+        policy.set_state(state.policy_state)
     # Job Loss Scenario Control
     job_loss_enabled = params.get("enable_job_loss", False)
+    salary = params["gross_annual_salary_usd"]
     if job_loss_enabled:
         job_loss_start = params.get("job_loss_start", 0)
         job_loss_end = job_loss_start + params.get("job_loss_duration", 0)
-        income_recovery = params.get("income_recovery_rate", 0) / 100    
-    investment_balance = 0
-    loan_balance = params['loan_amount_inr']
+        income_recovery = params.get("income_recovery_rate", 0) / 100
+        reduced_salary = salary * income_recovery
+    investment_balance = state.investment_balance
+    loan_balance = state.loan_balance
     emi = params['emi_inr']
 
-    fx_rate = params["usd_to_inr_rate"]
-    expenses = params["monthly_expenses_usd"]
-
-    results = []
-
-    fx_rate = params["usd_to_inr_rate"]
-    expenses = params["monthly_expenses_usd"]
-    
-    for month in range(1, months + 1):
-        row = {}
-        invest_contrib = 0
-        extra_payment = 0
-        loan_payment = emi
-        strategy = params['strategy']
-        
-        in_moratorium = month <= params['moratorium_months']
+    fx_rate = state.fx_rate
+    expenses = state.expenses
+    # Monthly factors are read once; the loop below never touches params
+    fx_drift = (1 + params["fx_drift_rate"] / 12) if params.get("enable_fx_drift") else None
+    inflation = (1 + params["inflation_rate"] / 12) if params.get("enable_inflation") else None
+    after_tax = 1 - params["us_tax_rate"]
+    loan_rate = params['interest_rate_loan'] / 12
+    growth = 1 + params['investment_rate_annual'] / 12
+    share = policy.share
+    months_to_clear = state.months_to_clear
+    next_checkpoint = (state.month // checkpoint_every + 1) * checkpoint_every if checkpoints is not None else None
 
+    for month in range(state.month + 1, months + 1):
         # Apply currency fluctuation
-        if params.get("enable_fx_drift"):
-            fx_rate *= (1 + params["fx_drift_rate"] / 12)
-    
+        if fx_drift is not None:
+            fx_rate *= fx_drift
+
         # Apply inflation to expenses
-        if params.get("enable_inflation"):
-            expenses *= (1 + params["inflation_rate"] / 12)
-    
+        if inflation is not None:
+            expenses *= inflation
+
         # Apply job loss effect
         if job_loss_enabled and job_loss_start <= month <= job_loss_end:
-            effective_salary = params["gross_annual_salary_usd"] * income_recovery
+            effective_salary = reduced_salary
         else:
-            effective_salary = params["gross_annual_salary_usd"]
-    
+            effective_salary = salary
+
         # Recalculate monthly income and savings
-        monthly_income = (effective_salary / 12) * (1 - params["us_tax_rate"])
-        monthly_savings_usd = monthly_income - expenses
-        monthly_savings_inr = monthly_savings_usd * fx_rate
-
-        # STRATEGY LOGIC
-        if strategy == "A":  # Aggressive Repayment
-            extra_payment = monthly_savings_inr
-        elif strategy == "B":  # Balanced
-            invest_contrib = monthly_savings_inr * (params['percent_to_invest'] / 100)
-            extra_payment = monthly_savings_inr - invest_contrib
-        elif strategy == "C":  # Invest first, then Balanced
-            if in_moratorium:
-                invest_contrib = monthly_savings_inr
-            else:
-                invest_contrib = monthly_savings_inr * (params['percent_to_invest'] / 100)
-                extra_payment = monthly_savings_inr - invest_contrib
-        elif strategy == "D":  # Invest first, then Aggressive
-            if in_moratorium:
-                invest_contrib = monthly_savings_inr
-            else:
-                extra_payment = monthly_savings_inr
-        elif strategy == "E":  # Dynamic Allocation
-            if loan_balance > (params['loan_amount_inr'] * (1 - params['threshold_pct'] / 100)):
-                extra_payment = monthly_savings_inr
-            else:
-                invest_contrib = monthly_savings_inr
-        elif strategy == "F":  # Risk-Aware Allocation
-            risk_factor = 0.6 if params['risk_type'] == "Job Security" else 0.4
-            invest_contrib = monthly_savings_inr * risk_factor
-            extra_payment = monthly_savings_inr - invest_contrib
-        elif strategy == "G":  # Random Split Simulation
-            split = random.uniform(0, 1)
-            invest_contrib = monthly_savings_inr * split
-            extra_payment = monthly_savings_inr - invest_contrib
+        monthly_income = (effective_salary / 12) * after_tax
+        monthly_savings_inr = (monthly_income - expenses) * fx_rate
+
+        # STRATEGY LOGIC: the policy sets the invested share, the rest prepays the loan
+        invest_contrib = monthly_savings_inr * share(month, loan_balance)
+        extra_payment = monthly_savings_inr - invest_contrib
 
         # Apply payments
-        interest_payment = loan_balance * (params['interest_rate_loan'] / 12)
+        interest_payment = loan_balance * loan_rate
         principal_payment = max(0, extra_payment + emi - interest_payment)
         loan_balance = max(0, loan_balance - principal_payment)
-        investment_balance = investment_balance * (1 + params['investment_rate_annual'] / 12) + invest_contrib
+        investment_balance = investment_balance * growth + invest_contrib
         net_worth = investment_balance - loan_balance
 
-        row['Month'] = month
-        row['Loan Balance'] = loan_balance
-        row['Investment Balance'] = investment_balance
-        row['Net Worth'] = net_worth
-        row['EMI'] = emi
-        row['Invested'] = invest_contrib
-        row['Extra Loan Payment'] = extra_payment
-
-        results.append(row)
-
-    df = pd.DataFrame(results).set_index("Month")
-    summary = {
-        'final_net_worth': df['Net Worth'].iloc[-1],
-        'final_loan_balance': df['Loan Balance'].iloc[-1],
-        'final_investment_balance': df['Investment Balance'].iloc[-1],
-        'months_to_clear_loan': (df['Loan Balance'] == 0).idxmax() if (df['Loan Balance'] == 0).any() else "Not Cleared"
+        if months_to_clear == "Not Cleared" and loan_balance == 0:
+            months_to_clear = month
+
+        if columns is not None:
+            i = month - 1
+            columns['Loan Balance'][i] = loan_balance
+            columns['Investment Balance'][i] = investment_balance
+            columns['Net Worth'][i] = net_worth
+            columns['Invested'][i] = invest_contrib
+            columns['Extra Loan Payment'][i] = extra_payment
+
+        if month == next_checkpoint:
+            checkpoints.append(SimulationState(month, loan_balance, investment_balance, fx_rate, expenses,
+                                               months_to_clear, policy.get_state()))
+            next_checkpoint += checkpoint_every
+
+    return SimulationState(max(months, state.month), loan_balance, investment_balance, fx_rate, expenses,
+                           months_to_clear, policy.get_state())
+
+@timed("simulate_strategy")
+def simulate_strategy(params, summary_only=False):
+    count("simulations_run")
+    columns = None if summary_only else empty_columns(params)
+    state = _run_months(params, SimulationState.initial(params), columns)
+    return SimulationResult(state.summary(), columns)
+
+def _closed_form_loan(loan_balance, payment, rate, months):
+    # Balance after `months` constant payments, and the month it hits zero
+    # (None if it does not clear in this stretch)
+    if months <= 0:
+        return loan_balance, None
+    if loan_balance <= 0:
+        return 0.0, 1
+    if payment - loan_balance * rate <= 0:
+        return loan_balance, None  # payment never covers the interest
+    if rate == 0:
+        cleared = math.ceil(loan_balance / payment)
+        balance = lambda k: loan_balance - k * payment
+    else:
+        steady = payment / rate
+        cleared = math.ceil(math.log(payment / (payment - loan_balance * rate)) / math.log1p(rate))
+        balance = lambda k: loan_balance - (steady - loan_balance) * math.expm1(k * math.log1p(rate))
+    # Guard the rounded month against floating point error on either side
+    cleared = max(cleared, 1)
+    while cleared > 1 and balance(cleared - 1) <= 0:
+        cleared -= 1
+    while balance(cleared) > 0:
+        cleared += 1
+    if cleared <= months:
+        return 0.0, cleared
+    return balance(months), None
+
+def _closed_form_investment(balance, contribution, rate, months):
+    if months <= 0:
+        return balance
+    if rate == 0:
+        return balance + months * contribution
+    growth = math.expm1(months * math.log1p(rate))
+    return balance * (1 + growth) + contribution * growth / rate
+
+@timed("closed_form_summary")
+def closed_form_summary(params):
+    # Summary without the monthly loop, or None when the strategy or the
+    # scenario engine make savings or allocation vary month to month
+    policy_class = STRATEGY_REGISTRY.get(params.get('strategy'))
+    if policy_class is None or policy_class.varies or params.get("enable_job_loss") or params.get("enable_inflation") or params.get("enable_fx_drift"):
+        return None
+    loan_rate = params['interest_rate_loan'] / 12
+    investment_rate = params['investment_rate_annual'] / 12
+    if loan_rate < 0 or investment_rate <= -1:
+        return None
+
+    count("closed_form_summaries")
+    months = params['years'] * 12
+    monthly_income = (params["gross_annual_salary_usd"] / 12) * (1 - params["us_tax_rate"])
+    monthly_savings_inr = (monthly_income - params["monthly_expenses_usd"]) * params["usd_to_inr_rate"]
+    moratorium = min(max(math.floor(params['moratorium_months']), 0), months)
+
+    loan_balance = params['loan_amount_inr']
+    investment_balance = 0.0
+    months_to_clear = None
+    elapsed = 0
+    shares = policy_class(params).shares
+    for share, length in zip(shares, (moratorium, months - moratorium)):
+        invest_contrib = monthly_savings_inr * share
+        payment = monthly_savings_inr - invest_contrib + params['emi_inr']
+        loan_balance, cleared = _closed_form_loan(loan_balance, payment, loan_rate, length)
+        if months_to_clear is None and cleared is not None:
+            months_to_clear = elapsed + cleared
+        investment_balance = _closed_form_investment(investment_balance, invest_contrib, investment_rate, length)
+        elapsed += length
+
+    return {
+        'final_net_worth': investment_balance - loan_balance,
+        'final_loan_balance': loan_balance,
+        'final_investment_balance': investment_balance,
+        'months_to_clear_loan': months_to_clear if months_to_clear is not None else "Not Cleared"
     }
 
-    return df, summary
+def simulate_summary(params):
+    summary = closed_form_summary(params)
+    if summary is None:
+        summary = simulate_strategy(params, summary_only=True).summary
+    return summary
+
+BATCH_COLUMNS = ['Loan Balance', 'Investment Balance', 'Net Worth', 'Invested', 'Extra Loan Payment']
+
+def _batch_table(param_table, size=None):
+    if isinstance(param_table, pd.DataFrame):
+        index = param_table.index
+        columns = {key: param_table[key].to_numpy() for key in param_table.columns}
+    elif isinstance(param_table, (list, tuple)):
+        frame = pd.DataFrame(list(param_table))
+        index = frame.index
+        columns = {key: frame[key].to_numpy() for key in frame.columns}
+    else:
+        index = None
+        columns = dict(param_table)
+
+    lengths = {len(value) for value in columns.values() if np.ndim(value) == 1}
+    if len(lengths) > 1:
+        raise ValueError(f"All parameter columns must have the same length, got {sorted(lengths)}")
+    if size is None:
+        size = lengths.pop() if lengths else 1
+    elif lengths and lengths != {size}:
+        raise ValueError(f"Parameter columns have length {lengths.pop()}, expected {size}")
+    if index is None:
+        index = pd.RangeIndex(size)
+
+    columns = {key: np.broadcast_to(np.asarray(value), (size,)) for key, value in columns.items()}
+    return columns, index, size
+
+def _batch_number(columns, key, size, default=None):
+    if key not in columns:
+        if default is None:
+            raise KeyError(key)
+        return np.full(size, float(default))
+    values = np.asarray(columns[key])
+    if values.dtype.kind in "biuf":
+        values = values.astype(float)
+    else:
+        values = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+    if default is not None:
+        values = np.where(np.isnan(values), float(default), values)
+    return values
 
-def simulate_multiple_runs(params, runs=100):
+def _batch_flag(columns, key, size):
+    if key not in columns:
+        return np.zeros(size, dtype=bool)
+    values = np.asarray(columns[key], dtype=object)
+    return pd.notna(values) & values.astype(bool)
+
+def _batch_text(columns, key, size, default=""):
+    if key not in columns:
+        return np.full(size, default, dtype=object)
+    return np.asarray(columns[key], dtype=object)
+
+def _batch_inputs(columns, size):
+    years = _batch_number(columns, 'years', size)
+    if np.any(years < 1) or np.any(years * 12 != np.floor(years * 12)):
+        raise ValueError("'years' must cover a whole, positive number of months")
+
+    p = {
+        'months': (years * 12).astype(np.int64),
+        'loan_amount_inr': _batch_number(columns, 'loan_amount_inr', size),
+        'emi_inr': _batch_number(columns, 'emi_inr', size),
+        'interest_rate_loan': _batch_number(columns, 'interest_rate_loan', size),
+        'investment_rate_annual': _batch_number(columns, 'investment_rate_annual', size),
+        'usd_to_inr_rate': _batch_number(columns, 'usd_to_inr_rate', size),
+        'monthly_expenses_usd': _batch_number(columns, 'monthly_expenses_usd', size),
+        'gross_annual_salary_usd': _batch_number(columns, 'gross_annual_salary_usd', size),
+        'us_tax_rate': _batch_number(columns, 'us_tax_rate', size),
+        'moratorium_months': _batch_number(columns, 'moratorium_months', size, 0),
+        'years': years,
+        'percent_to_invest': _batch_number(columns, 'percent_to_invest', size, 0),
+        'threshold_pct': _batch_number(columns, 'threshold_pct', size, 0),
+        'moratorium_invest_pct': _batch_number(columns, 'moratorium_invest_pct', size, 100),
+        'strategy': _batch_text(columns, 'strategy', size),
+        'risk_type': _batch_text(columns, 'risk_type', size),
+    }
+
+    # Scenario engine fields only count where their toggle is on
+    job_loss = _batch_flag(columns, 'enable_job_loss', size)
+    job_loss_start = _batch_number(columns, 'job_loss_start', size, 0)
+    job_loss_end = job_loss_start + _batch_number(columns, 'job_loss_duration', size, 0)
+    p['job_loss_start'] = np.where(job_loss, job_loss_start, np.inf)
+    p['job_loss_end'] = np.where(job_loss, job_loss_end, -np.inf)
+    p['income_recovery'] = _batch_number(columns, 'income_recovery_rate', size, 0) / 100
+    p['fx_factor'] = np.where(_batch_flag(columns, 'enable_fx_drift', size),
+                              1 + _batch_number(columns, 'fx_drift_rate', size, 0) / 12, 1.0)
+    p['expense_factor'] = np.where(_batch_flag(columns, 'enable_inflation', size),
+                                   1 + _batch_number(columns, 'inflation_rate', size, 0) / 12, 1.0)
+    return p
+
+def _batch_policies(p):
+    # (rows, policy) for every strategy code in the chunk; rows is None when
+    # a single policy covers the whole chunk
+    codes = pd.unique(p['strategy'])
+    if len(codes) == 1:
+        return [(None, get_policy_class(codes[0])(p, batch=True))]
+    groups = []
+    for code in codes:
+        rows = np.flatnonzero(p['strategy'] == code)
+        groups.append((rows, get_policy_class(code)({key: value[rows] for key, value in p.items()}, batch=True)))
+    return groups
+
+def _simulate_batch_chunk(p, draw_splits, paths=None, market=None, on_month=None):
+    # market(month) -> (growth, fx factor) per row replaces the constant
+    # investment growth and FX drift; on_month(month, net_worth) sees the net
+    # worth of every row still inside its horizon
+    n = len(p['months'])
+    horizon = p['months']
+    months = int(horizon.max())
+    same_horizon = bool((horizon == months).all())
+
+    loan_balance = p['loan_amount_inr'].copy()
+    investment_balance = np.zeros(n)
+    fx_rate = p['usd_to_inr_rate'].copy()
+    expenses = p['monthly_expenses_usd'].copy()
+    emi = p['emi_inr']
+    loan_rate = p['interest_rate_loan'] / 12
+    growth = 1 + p['investment_rate_annual'] / 12
+
+    full_income = (p['gross_annual_salary_usd'] / 12) * (1 - p['us_tax_rate'])
+    reduced_income = ((p['gross_annual_salary_usd'] * p['income_recovery']) / 12) * (1 - p['us_tax_rate'])
+    policies = _batch_policies(p)
+
+    any_job_loss = bool(np.isfinite(p['job_loss_start']).any())
+    any_fx_drift = bool((p['fx_factor'] != 1.0).any())
+    any_inflation = bool((p['expense_factor'] != 1.0).any())
+
+    months_with_loan = np.zeros(n, dtype=np.int64)
+    final_loan = np.empty(n)
+    final_investment = np.empty(n)
+    final_positive = np.empty(n, dtype=np.int64)
+    ends = {month: np.flatnonzero(horizon == month) for month in np.unique(horizon)}
+
+    savings = np.empty(n)
+    invest = np.empty(n)
+    extra = np.empty(n)
+    interest = np.empty(n)
+    principal = np.empty(n)
+    share = np.empty(n)
+
+    # Savings only move with the scenario engine and the allocation only moves
+    # with the moratorium or a policy that varies, so most months reuse them
+    dynamic_savings = any_fx_drift or any_inflation or any_job_loss or market is not None
+    dynamic_share = any(policy.varies for _, policy in policies)
+    last_switch = int(np.clip(p['moratorium_months'].max(), 0, months)) + 1
+    payment = np.empty(n)
+    with_loan = np.empty(n, dtype=bool)
+    # paths holds (months, n) arrays for any of BATCH_COLUMNS, in any dtype;
+    # these are updated in place every month
+    path_sources = {'Loan Balance': loan_balance, 'Investment Balance': investment_balance, 'Invested': invest,
+                    'Extra Loan Payment': extra}
+
+    for month in range(1, months + 1):
+        if market is not None:
+            growth, fx_factor = market(month)
+            fx_rate *= fx_factor
+        elif any_fx_drift:
+            fx_rate *= p['fx_factor']
+        if any_inflation:
+            expenses *= p['expense_factor']
+
+        if dynamic_savings or month == 1:
+            if any_job_loss:
+                in_job_loss = (p['job_loss_start'] <= month) & (month <= p['job_loss_end'])
+                np.subtract(np.where(in_job_loss, reduced_income, full_income), expenses, out=savings)
+            else:
+                np.subtract(full_income, expenses, out=savings)
+            savings *= fx_rate
+
+        if dynamic_savings or dynamic_share or month <= last_switch:
+            for rows, policy in policies:
+                if rows is None:
+                    share = policy.batch_share(month, loan_balance, draw_splits)
+                else:
+                    share[rows] = policy.batch_share(month, loan_balance[rows], draw_splits)
+            np.multiply(savings, share, out=invest)
+            np.subtract(savings, invest, out=extra)
+            np.add(extra, emi, out=payment)
+
+        # Apply payments
+        np.multiply(loan_balance, loan_rate, out=interest)
+        np.subtract(payment, interest, out=principal)
+        np.maximum(principal, 0, out=principal)
+        np.subtract(loan_balance, principal, out=loan_balance)
+        np.maximum(loan_balance, 0, out=loan_balance)
+        investment_balance *= growth
+        investment_balance += invest
+        np.greater(loan_balance, 0, out=with_loan)
+        months_with_loan += with_loan
+
+        if paths is not None:
+            for name, target in paths.items():
+                if name == 'Net Worth':
+                    np.subtract(investment_balance, loan_balance, out=target[month - 1])
+                else:
+                    target[month - 1] = path_sources[name]
+        if on_month is not None:
+            net_worth = investment_balance - loan_balance
+            on_month(month, net_worth if same_horizon else net_worth[horizon >= month])
+
+        rows = ends.get(month)
+        if rows is not None:
+            final_loan[rows] = loan_balance[rows]
+            final_investment[rows] = investment_balance[rows]
+            final_positive[rows] = months_with_loan[rows]
+
+    cleared = np.where(final_loan == 0, final_positive + 1, np.nan)
+    return final_investment - final_loan, final_loan, final_investment, cleared
+
+@timed("simulate_batch")
+def simulate_batch(param_table, paths=False, seed=None, size=None, chunk_size=16384, common_splits=False,
+                   market=None, on_month=None):
+    # common_splits gives every Strategy G row the same monthly split sequence
+    # (common random numbers), so rows differ only by their parameters.
+    # market is a paths.py model drawing random returns and FX from the same
+    # seeded stream; on_month is passed through to every chunk. paths=True
+    # returns the monthly columns as a float64 ResultStore of (rows, months)
+    # arrays; pass a ResultStore instead to fill a float32 or memory-mapped one
+    # (or only some of the columns).
+    columns, index, size = _batch_table(param_table, size)
+    p = _batch_inputs(columns, size)
+    for code in pd.unique(p['strategy']):
+        get_policy_class(code)  # unknown codes fail before any work
+    rng = np.random.default_rng(seed)
+    if common_splits:
+        splits = rng.random(int(p['months'].max()) if size else 0)
+        draw_splits = lambda month, k: np.full(k, splits[month - 1])
+    else:
+        draw_splits = lambda month, k: rng.random(k)
+    count("simulations_run", size)
+    count("months_simulated", int(p['months'].sum()))
+
+    summary = np.empty((size, 4))
+    monthly = None
+    if isinstance(paths, ResultStore):
+        monthly = paths
+        if monthly.paths != size:
+            raise ValueError(f"Result store holds {monthly.paths} paths for {size} scenarios")
+    elif paths:
+        monthly = ResultStore(size, int(p['months'].max()) if size else 0, MONTHLY_COLUMNS, np.float64)
+
+    # Grouping rows by strategy keeps most chunks on a single allocation rule
+    order = np.argsort(p['strategy'].astype(str), kind='stable')
+    for start in range(0, size, chunk_size):
+        rows = order[start:start + chunk_size]
+        chunk = {key: value[rows] for key, value in p.items()}
+        chunk_paths = None
+        if monthly is not None:
+            chunk_months = int(chunk['months'].max())
+            # Only the store's columns, in its dtype
+            chunk_paths = {name: np.empty((chunk_months, len(rows)), monthly.dtype)
+                           for name in BATCH_COLUMNS if name in monthly.columns}
+        step = market.stepper(chunk, rng) if market is not None else None
+        summary[rows] = np.column_stack(_simulate_batch_chunk(chunk, draw_splits, chunk_paths, step, on_month))
+        if monthly is not None:
+            # Months past a scenario's own horizon are stored as NaN
+            columns = {name: values.T for name, values in chunk_paths.items()}
+            if 'EMI' in monthly.columns:
+                columns['EMI'] = np.broadcast_to(chunk['emi_inr'][:, None], (len(rows), chunk_months))
+            monthly.write(rows, columns, chunk['months'])
+
+    summary = pd.DataFrame(summary, index=index, columns=[
+        'final_net_worth', 'final_loan_balance', 'final_investment_balance', 'months_to_clear_loan'])
+    return summary, monthly
+
+MONTE_CARLO_CHUNK = 100_000
+# Runs per random stream: run i is always drawn from stream i // MONTE_CARLO_BLOCK
+# spawned from the seed, so results do not depend on how runs are grouped into
+# chunks; chunk sizes are rounded up to whole blocks
+MONTE_CARLO_BLOCK = 10_000
+
+@timed("monte_carlo_chunk")
+def _monte_carlo_chunk(run_params, entropy, first_block, size, market=None, monthly=False):
+    # Final net worth of each block of the chunk, whichever worker runs it.
+    # With monthly=True each block also returns the (months x block) float32
+    # net worth of every path.
     results = []
-    for i in range(runs):
-        run_params = params.copy()
-        run_params['strategy'] = 'G'  # force strategy G for all runs
-        df, summary = simulate_strategy(run_params)
-        results.append({
-            'Run': i + 1,
-            'Final Net Worth (INR)': summary['final_net_worth']
-        })
-    return pd.DataFrame(results)
+    for block, start in enumerate(range(0, size, MONTE_CARLO_BLOCK), first_block):
+        block_size = min(MONTE_CARLO_BLOCK, size - start)
+        rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(block,)))
+        if not monthly:
+            summary, _ = simulate_batch(run_params, size=block_size, seed=rng, chunk_size=block_size, market=market)
+            results.append(summary['final_net_worth'].to_numpy())
+            continue
+        net_worth = np.empty((int(run_params['years'] * 12), block_size), dtype=np.float32)
+        def collect(month, values):
+            net_worth[month - 1] = values
+        summary, _ = simulate_batch(run_params, size=block_size, seed=rng, chunk_size=block_size, market=market,
+                                    on_month=collect)
+        results.append((summary['final_net_worth'].to_numpy(), net_worth))
+    return results
+
+def monte_carlo_chunks(params, runs, seed=None, chunk_size=MONTE_CARLO_CHUNK, market=None, monthly=False):
+    # (function, arguments) for every chunk of a Strategy G run; each returns
+    # a list of per-block results. Results only depend on the seed.
+    entropy = np.random.SeedSequence(seed).entropy
+    run_params = params.copy()
+    run_params['strategy'] = 'G'  # force strategy G for all runs
+    chunk_size = max(-(-chunk_size // MONTE_CARLO_BLOCK), 1) * MONTE_CARLO_BLOCK
+    return [partial(_monte_carlo_chunk, run_params, entropy, start // MONTE_CARLO_BLOCK,
+                    min(chunk_size, runs - start), market, monthly)
+            for start in range(0, runs, chunk_size)]
+
+@timed("simulate_multiple_runs")
+def simulate_multiple_runs(params, runs=100, seed=None, executor=None, chunk_size=MONTE_CARLO_CHUNK):
+    chunks = get_executor(executor).map(operator.call, monte_carlo_chunks(params, runs, seed, chunk_size))
+    final_net_worth = np.concatenate([values for blocks in chunks for values in blocks] or [np.empty(0)])
+    return pd.DataFrame({
+        'Run': np.arange(1, runs + 1),
+        'Final Net Worth (INR)': final_net_worth
+    })
 
-def optimize_investment_split(params, step=5):
+def _split_point(params, strategy, invest_pct):
+    test_params = params.copy()
+    test_params["percent_to_invest"] = invest_pct
+    test_params["strategy"] = strategy
+    summary = simulate_summary(test_params)
+    return {
+        "Investment %": invest_pct,
+        "Final Net Worth": summary["final_net_worth"]
+    }
+
+@timed("optimize_investment_split")
+def optimize_investment_split(params, step=5, method="grid", tol=0.1, executor=None, on_point=None):
+    # on_point(curve) sees the curve so far after every point; the grid then
+    # runs point by point in this thread
     strategy = params.get("strategy", "B")
     if strategy not in ["B", "C"]:
         return pd.DataFrame()
 
+    if method == "golden":
+        from optimizer import optimize_split
+        return optimize_split(params, step=step, tol=tol, on_point=on_point)
+
+    if on_point is None:
+        results = get_executor(executor).map(partial(_split_point, params, strategy), range(0, 101, step))
+        return pd.DataFrame(results)
     results = []
     for invest_pct in range(0, 101, step):
-        test_params = params.copy()
-        test_params["percent_to_invest"] = invest_pct
-        test_params["strategy"] = strategy
-        df, summary = simulate_strategy(test_params)
-        results.append({
-            "Investment %": invest_pct,
-            "Final Net Worth": summary["final_net_worth"]
-        })
-
+        results.append(_split_point(params, strategy, invest_pct))
+        on_point(pd.DataFrame(results))
     return pd.DataFrame(results)
 
-def compare_strategies(params, strategies):
-    results = []
-
-    for strategy_code in strategies:
-        try:
-            test_params = params.copy()
-            test_params["strategy"] = strategy_code
-            df, summary = simulate_strategy(test_params)
-            results.append({
-                "Strategy": strategy_code,
-                "Final Net Worth": summary["final_net_worth"],
-                "Loan Cleared In (Months)": summary["months_to_clear_loan"],
-                "Final Investment Balance": summary["final_investment_balance"]
-            })
-        except Exception as e:
-            print(f"❌ Failed to simulate strategy {strategy_code}: {e}")
-            continue
+def _compare_row(params, summarize, strategy_code):
+    try:
+        test_params = params.copy()
+        test_params["strategy"] = strategy_code
+        summary = summarize(test_params)
+        return {
+            "Strategy": strategy_code,
+            "Final Net Worth": summary["final_net_worth"],
+            "Loan Cleared In (Months)": summary["months_to_clear_loan"],
+            "Final Investment Balance": summary["final_investment_balance"]
+        }
+    except Exception as e:
+        print(f"❌ Failed to simulate strategy {strategy_code}: {e}")
+        return None
 
-    return pd.DataFrame(results)
+@timed("compare_strategies")
+def compare_strategies(params, strategies, summarize=None, executor=None):
+    summarize = simulate_summary if summarize is None else summarize
+    results = get_executor(executor).map(partial(_compare_row, params, summarize), strategies)
+    return pd.DataFrame([row for row in results if row is not None])
 
@@ -0,0 +1,167 @@
+import random
+
+import numpy as np
+
+# Every strategy is an allocation policy: each month it decides the share of
+# savings that is invested, and the rest goes to the loan as an extra payment
+# (invest = savings * share, extra = savings - invest). Policies read their
+# constants once, from a params dict of scalars (simulate_strategy) or of
+# per-row arrays (simulate_batch), so the monthly loops never look at params.
+STRATEGY_REGISTRY = {}
+
+
+def register_strategy(policy_class):
+    STRATEGY_REGISTRY[policy_class.code] = policy_class
+    return policy_class
+
+
+def get_policy_class(code):
+    policy_class = STRATEGY_REGISTRY.get(code)
+    if policy_class is None:
+        raise ValueError(f"Unknown strategy {code!r}, registered: {sorted(STRATEGY_REGISTRY)}")
+    return policy_class
+
+
+def get_policy(params, batch=False):
+    return get_policy_class(params['strategy'])(params, batch)
+
+
+class AllocationPolicy:
+    code = None
+    name = ""
+    # True when the share can change in any month (balances, randomness or
+    # time); otherwise it only switches at the end of the moratorium and
+    # the strategy qualifies for the closed-form summary
+    varies = False
+
+    def __init__(self, params, batch=False):
+        self.batch = batch
+        self.moratorium = params['moratorium_months']
+        self.shares = self.moratorium_shares(params)
+
+    def moratorium_shares(self, params):
+        # (share during moratorium, share after)
+        return 0.0, 0.0
+
+    def share(self, month, loan_balance):
+        return self.shares[0] if month <= self.moratorium else self.shares[1]
+
+    def batch_share(self, month, loan_balance, draw_splits):
+        return np.where(month <= self.moratorium, self.shares[0], self.shares[1])
+
+    # State carried between months (e.g. a random stream), saved in
+    # simulation checkpoints so a run can resume mid-horizon
+    def get_state(self):
+        return None
+
+    def set_state(self, state):
+        pass
+
+
+@register_strategy
+class AggressiveRepayment(AllocationPolicy):
+    code = "A"
+    name = "Aggressive Repayment"
+
+
+@register_strategy
+class Balanced(AllocationPolicy):
+    code = "B"
+    name = "Balanced"
+
+    def moratorium_shares(self, params):
+        invest_share = params['percent_to_invest'] / 100
+        return invest_share, invest_share
+
+
+@register_strategy
+class InvestFirstThenBalanced(AllocationPolicy):
+    code = "C"
+    name = "Invest First, Then Balanced"
+
+    def moratorium_shares(self, params):
+        return params.get('moratorium_invest_pct', 100) / 100, params['percent_to_invest'] / 100
+
+
+@register_strategy
+class InvestFirstThenAggressive(AllocationPolicy):
+    code = "D"
+    name = "Invest First, Then Aggressive"
+
+    def moratorium_shares(self, params):
+        return params.get('moratorium_invest_pct', 100) / 100, 0.0
+
+
+@register_strategy
+class DynamicAllocation(AllocationPolicy):
+    code = "E"
+    name = "Dynamic Allocation"
+    varies = True
+
+    def __init__(self, params, batch=False):
+        super().__init__(params, batch)
+        self.threshold = params['loan_amount_inr'] * (1 - params['threshold_pct'] / 100)
+
+    def share(self, month, loan_balance):
+        return 0.0 if loan_balance > self.threshold else 1.0
+
+    def batch_share(self, month, loan_balance, draw_splits):
+        return np.less_equal(loan_balance, self.threshold).astype(float)
+
+
+@register_strategy
+class RiskAwareAllocation(AllocationPolicy):
+    code = "F"
+    name = "Risk-Aware Allocation"
+
+    def moratorium_shares(self, params):
+        if self.batch:
+            risk_factor = np.where(params['risk_type'] == "Job Security", 0.6, 0.4)
+        else:
+            risk_factor = 0.6 if params['risk_type'] == "Job Security" else 0.4
+        return risk_factor, risk_factor
+
+
+@register_strategy
+class RandomSplit(AllocationPolicy):
+    code = "G"
+    name = "Random Split Simulation"
+    varies = True
+
+    def __init__(self, params, batch=False):
+        super().__init__(params, batch)
+        # Strategy G draws from a private stream when a seed is given
+        self.rng = random.Random(params['seed']) if not batch and params.get('seed') is not None else random
+
+    def share(self, month, loan_balance):
+        return self.rng.uniform(0, 1)
+
+    def get_state(self):
+        # An unseeded run shares the global stream and cannot be resumed
+        return self.rng.getstate() if self.rng is not random else None
+
+    def set_state(self, state):
+        self.rng.setstate(state)
+
+    def batch_share(self, month, loan_balance, draw_splits):
+        return draw_splits(month, len(loan_balance))
+
+
+@register_strategy
+class GlidePath(AllocationPolicy):
+    # Invested share ramps linearly from 0 in month 1 to percent_to_invest in
+    # the final month
+    code = "H"
+    name = "Glide Path"
+    varies = True
+
+    def __init__(self, params, batch=False):
+        super().__init__(params, batch)
+        self.target = params['percent_to_invest'] / 100
+        self.months = params['years'] * 12
+
+    def share(self, month, loan_balance):
+        return self.target * (month / self.months)
+
+    def batch_share(self, month, loan_balance, draw_splits):
+        return self.target * (month / self.months)
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+from simulation import simulate_batch, simulate_strategy
+from test_equivalence import BASE, SUMMARY_FIELDS, random_params
+
+
+def test_batch_matches_scalar():
+    rs = random.Random(1)
+    rows = [random_params(rs, 'ABCDEFH') for _ in range(300)]
+    summary, paths = simulate_batch(rows, paths=True)
+    for i, p in enumerate(rows):
+        expected = simulate_strategy(p)
+        got = summary.iloc[i]
+        for field in SUMMARY_FIELDS:
+            assert got[field] == expected.summary[field], (field, p)
+        cleared = expected.summary['months_to_clear_loan']
+        if cleared == "Not Cleared":
+            assert np.isnan(got['months_to_clear_loan']), p
+        else:
+            assert got['months_to_clear_loan'] == cleared, p
+        months = len(expected.columns['Net Worth'])
+        for name, values in expected.columns.items():
+            np.testing.assert_array_equal(paths[name][i, :months], values, err_msg=f"{name} {p}")
+
+
+def test_seeded_batch_is_repeatable():
+    a, _ = simulate_batch(dict(BASE, strategy='G'), size=5, seed=3)
+    b, _ = simulate_batch(dict(BASE, strategy='G'), size=5, seed=3)
+    assert a.equals(b)
+
+
+def test_chunking_and_mixed_horizons():
+    rs = random.Random(2)
+    rows = [random_params(rs, 'ABCDEFH') for _ in range(50)]
+    whole, whole_paths = simulate_batch(rows, paths=True)
+    chunked, chunked_paths = simulate_batch(rows, paths=True, chunk_size=7)
+    assert whole.equals(chunked)
+    for name in whole_paths.columns:
+        np.testing.assert_array_equal(whole_paths[name], chunked_paths[name])
+    months = np.array([p['years'] * 12 for p in rows])
+    net_worth = whole_paths['Net Worth']
+    assert np.isnan(net_worth[np.arange(net_worth.shape[1]) >= months[:, None]]).all()
+    assert not np.isnan(net_worth[np.arange(net_worth.shape[1]) < months[:, None]]).any()
+
+
+def test_unknown_strategy_fails_before_work():
+    with pytest.raises(ValueError, match="Unknown strategy 'Z'"):
+        simulate_batch([dict(BASE, strategy='Z')])
@@ -0,0 +1,75 @@
+import random
+
+import pandas as pd
+import pytest
+
+import bulk_runner
+from bulk_runner import run_bulk
+from simulation import simulate_strategy
+from test_equivalence import BASE, random_params
+
+
+def write_cohort(path, size=50):
+    rs = random.Random(8)
+    rows = [dict(random_params(rs, 'A'), profile_id=f"p{i}") for i in range(size)]
+    for row in rows:
+        del row['strategy']
+    rows[3]['years'] = 0
+    rows[11]['us_tax_rate'] = 1.5
+    rows[20]['gross_annual_salary_usd'] = None
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return rows
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_results_and_errors(tmp_path):
+    rows = write_cohort(tmp_path / "cohort.csv")
+    state = run_bulk(str(tmp_path / "cohort.csv"), str(tmp_path / "out.csv"), "ABG", chunk_size=16, seed=1,
+                     stream=None)
+    assert (state['profiles_ok'], state['profiles_failed'], state['results']) == (47, 3, 141)
+    errors = pd.read_csv(tmp_path / "out.csv.errors.csv")
+    assert sorted(errors['profile_id']) == ['p11', 'p20', 'p3']
+    out = pd.read_csv(tmp_path / "out.csv")
+    got = out[(out['profile_id'] == 'p7') & (out['strategy'] == 'B')].iloc[0]
+    expected = simulate_strategy(dict(BASE, **{k: v for k, v in rows[7].items() if k != 'profile_id'},
+                                      strategy='B')).summary
+    assert got['final_net_worth'] == pytest.approx(expected['final_net_worth'], rel=1e-9)
+
+
+def test_resume_matches_uninterrupted_run(tmp_path, monkeypatch):
+    write_cohort(tmp_path / "cohort.csv")
+    run = lambda name, **options: run_bulk(str(tmp_path / "cohort.csv"), str(tmp_path / f"{name}.csv"), "ABG",
+                                          str(tmp_path / f"{name}-paths.csv"), chunk_size=16, seed=1, stream=None,
+                                          **options)
+    run("full")
+
+    # Crash after the second chunk's files are written but before its checkpoint
+    save = bulk_runner._save_checkpoint
+    calls = []
+
+    def crash(path, state):
+        calls.append(path)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        save(path, state)
+
+    monkeypatch.setattr(bulk_runner, "_save_checkpoint", crash)
+    with pytest.raises(KeyboardInterrupt):
+        run("resumed")
+    monkeypatch.setattr(bulk_runner, "_save_checkpoint", save)
+    state = run("resumed", resume=True)
+    assert state['chunks_done'] == 4
+    for suffix in [".csv", ".csv.errors.csv", "-paths.csv"]:
+        assert read(tmp_path / f"resumed{suffix}") == read(tmp_path / f"full{suffix}"), suffix
+
+
+def test_resume_rejects_other_settings(tmp_path):
+    write_cohort(tmp_path / "cohort.csv")
+    run_bulk(str(tmp_path / "cohort.csv"), str(tmp_path / "out.csv"), "AB", chunk_size=16, stream=None)
+    with pytest.raises(ValueError, match="different settings"):
+        run_bulk(str(tmp_path / "cohort.csv"), str(tmp_path / "out.csv"), "AB", chunk_size=8, resume=True,
+                 stream=None)
@@ -0,0 +1,59 @@
+import os
+import pickle
+
+import cache
+from cache import MISSING, ResultCache, monte_carlo_key, params_key
+from test_equivalence import BASE
+
+
+def test_keys_ignore_inert_differences():
+    assert params_key('x', dict(BASE, years=10)) == params_key('x', dict(BASE, years=10.0))
+    assert params_key('x', dict(BASE, inflation_rate=0.3)) == params_key('x', BASE)
+    assert params_key('x', dict(BASE, enable_inflation=True, inflation_rate=0.3)) != \
+        params_key('x', dict(BASE, enable_inflation=True, inflation_rate=0.2))
+    assert params_key('x', BASE, step=5) != params_key('y', BASE, step=5)
+    assert monte_carlo_key(BASE, 1000, 3, chunk_size=10) == monte_carlo_key(BASE, 1000, 3, chunk_size=20000)
+    assert monte_carlo_key(BASE, 1000, 3) != monte_carlo_key(BASE, 1000, 4)
+
+
+def test_keys_are_salted_with_engine_version(monkeypatch):
+    key = params_key('x', BASE)
+    monkeypatch.setattr(cache, 'ENGINE_VERSION', 'other')
+    assert params_key('x', BASE) != key
+
+
+def test_memory_tier_evicts_least_recently_used():
+    results = ResultCache(max_bytes=1000)
+    results.put('a', b'x' * 300)
+    results.put('b', b'x' * 300)
+    results.put('c', b'x' * 300)
+    assert results.get('a') == b'x' * 300
+    results.put('d', b'x' * 300)
+    assert results.get('b') is MISSING
+    assert results.get('a') is not MISSING
+    assert results.stats()['evictions'] == 1
+
+
+def test_disk_tier_survives_restart_and_stays_in_budget(tmp_path):
+    blob_size = len(pickle.dumps(b'x' * 300, protocol=pickle.HIGHEST_PROTOCOL))
+    results = ResultCache(disk_dir=str(tmp_path), disk_max_bytes=3 * blob_size)
+    for key in ['aa1', 'bb2', 'cc3']:
+        results.put(key, b'x' * 300)
+    restarted = ResultCache(disk_dir=str(tmp_path), disk_max_bytes=3 * blob_size)
+    assert restarted.get('aa1') == b'x' * 300  # disk hit refreshes its mtime
+    restarted.put('dd4', b'x' * 300)
+    files = {name[:-4] for _, _, names in os.walk(tmp_path) for name in names}
+    assert files == {'aa1', 'cc3', 'dd4'}
+    assert restarted.stats()['disk_evictions'] == 1
+    assert restarted.stats()['disk_bytes'] <= 3 * blob_size
+
+
+def test_disk_tier_trims_on_open_and_skips_oversized_values(tmp_path):
+    results = ResultCache(disk_dir=str(tmp_path))
+    for key in ['aa1', 'bb2', 'cc3']:
+        results.put(key, b'x' * 300)
+    smaller = ResultCache(disk_dir=str(tmp_path), disk_max_bytes=700)
+    assert smaller.stats()['disk_bytes'] <= 700
+    smaller.put('dd4', b'x' * 1000)
+    assert not os.path.exists(smaller._disk_path('dd4'))
+    assert smaller.get('dd4') == b'x' * 1000  # still cached in memory
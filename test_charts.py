@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from charts import band_figure, downsample, histogram_figure, line_figure, lttb, path_bands
+from result_store import ResultStore
+
+
+@pytest.mark.parametrize("n, points", [(10_000, 1000), (361, 100), (1001, 1000), (5, 3), (50, 49)])
+def test_lttb_keeps_endpoints_and_budget(n, points):
+    y = np.random.default_rng(n).normal(size=n).cumsum()
+    keep = lttb(np.arange(n), y, points)
+    assert len(keep) == points
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+
+
+def test_lttb_keeps_short_series_and_peaks():
+    np.testing.assert_array_equal(lttb(np.arange(10), np.zeros(10), 20), np.arange(10))
+    np.testing.assert_array_equal(lttb(np.arange(10), np.zeros(10), 2), np.arange(10))
+    y = np.zeros(5000)
+    y[1234] = 100
+    assert 1234 in lttb(np.arange(5000), y, 50)
+
+
+def test_downsample_shares_x_and_skips_padding():
+    frame = pd.DataFrame({'a': np.arange(3000.0), 'b': np.sin(np.arange(3000.0))})
+    frame.loc[2500:, 'a'] = np.nan
+    kept = downsample(frame, ['a', 'b'], points=100)
+    assert len(kept) <= 200 and kept.index[-1] == 2499
+    assert not kept.isna().any().any()
+    fig = line_figure(frame, ['a', 'b'], points=100)
+    assert len(fig.data[0].x) == len(kept)
+
+
+def test_histogram_and_bands():
+    fig = histogram_figure([0, 1, 3], [4, 2])
+    assert list(fig.data[0].x) == [0.5, 2.0] and list(fig.data[0].width) == [1, 2]
+
+    values = np.random.default_rng(1).normal(size=(3000, 24)).cumsum(axis=1)
+    store = ResultStore(3000, 24, ['Net Worth'])
+    store['Net Worth'][:] = values
+    bands = path_bands(store, chunk_paths=700)
+    width = np.ptp(values, axis=0) * 1.5 / 512 * 4  # a few bins after range doubling
+    assert (np.abs(bands['P50'] - np.percentile(values, 50, axis=0)) <= width).all()
+    np.testing.assert_allclose(bands['Mean'], store['Net Worth'].mean(axis=0, dtype=float))
+    assert len(band_figure(bands).data) == 5
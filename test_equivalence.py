@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from simulation import closed_form_summary, simulate_strategy
+
+# Randomized checks of the closed-form summaries against the monthly loop in
+# simulate_strategy, which stays the reference implementation. BASE and
+# random_params are shared by the other test files.
+BASE = {
+    'years': 10, 'graduation_month': 1, 'moratorium_months': 6, 'gross_annual_salary_usd': 90000,
+    'us_tax_rate': 0.25, 'monthly_expenses_usd': 2000, 'loan_amount_inr': 2500000, 'interest_rate_loan': 0.11,
+    'emi_inr': 27000, 'loan_term_months': 120, 'investment_rate_annual': 0.12, 'indian_tax_rate': 0.15,
+    'usd_to_inr_rate': 83.5, 'percent_to_invest': 50, 'threshold_pct': 50, 'moratorium_invest_pct': 100,
+    'risk_type': "Job Security", 'enable_job_loss': False, 'job_loss_start': None, 'job_loss_duration': None,
+    'income_recovery_rate': None, 'enable_inflation': False, 'inflation_rate': 0, 'enable_fx_drift': False,
+    'fx_drift_rate': 0, 'strategy': 'B',
+}
+SUMMARY_FIELDS = ['final_net_worth', 'final_loan_balance', 'final_investment_balance']
+
+
+def random_params(rs, strategies, scenarios=True):
+    p = dict(BASE)
+    p['strategy'] = rs.choice(strategies)
+    p['years'] = rs.choice([1, 5, 10, 30])
+    p['moratorium_months'] = rs.randint(0, 24)
+    p['gross_annual_salary_usd'] = rs.choice([0, 20000, 40000, 90000, 150000])
+    p['loan_amount_inr'] = rs.choice([0, 500000, 2500000, 9000000])
+    p['emi_inr'] = rs.choice([0, 5000, 27000])
+    p['interest_rate_loan'] = rs.choice([0, 0.05, 0.11])
+    p['investment_rate_annual'] = rs.choice([0, 0.07, 0.12, 0.5])
+    p['percent_to_invest'] = rs.randint(0, 100)
+    p['threshold_pct'] = rs.randint(0, 100)
+    p['risk_type'] = rs.choice(["Job Security", "Investment Volatility"])
+    if scenarios:
+        if rs.random() < 0.4:
+            p.update(enable_job_loss=True, job_loss_start=rs.randint(1, 60), job_loss_duration=rs.randint(1, 24),
+                     income_recovery_rate=rs.randint(0, 100))
+        if rs.random() < 0.4:
+            p.update(enable_inflation=True, inflation_rate=rs.randint(0, 20) / 100)
+        if rs.random() < 0.4:
+            p.update(enable_fx_drift=True, fx_drift_rate=rs.randint(-10, 10) / 100)
+    return p
+
+
+def test_closed_form_matches_loop():
+    rs = random.Random(5)
+    for _ in range(1000):
+        p = random_params(rs, 'ABCDF', scenarios=False)
+        expected = simulate_strategy(p).summary
+        summary = closed_form_summary(p)
+        assert summary['months_to_clear_loan'] == expected['months_to_clear_loan'], p
+        for field in SUMMARY_FIELDS:
+            assert summary[field] == pytest.approx(expected[field], rel=1e-6,
+                                                   abs=1e-6 * max(1, p['loan_amount_inr'])), (field, p)
+
+
+def test_closed_form_declines_scenarios():
+    assert closed_form_summary(dict(BASE, enable_job_loss=True, job_loss_start=12, job_loss_duration=6,
+                                    income_recovery_rate=50)) is None
+    assert closed_form_summary(dict(BASE, strategy='E')) is None
@@ -0,0 +1,35 @@
+import pytest
+
+from executors import Executor, chunked, get_executor
+from montecarlo import run_monte_carlo
+from simulation import compare_strategies, optimize_investment_split, simulate_multiple_runs
+from test_equivalence import BASE
+
+
+@pytest.mark.parametrize("kind, workers", [("serial", None), ("thread", 3), ("process", 2)])
+def test_results_do_not_depend_on_workers(kind, workers):
+    p = dict(BASE, enable_inflation=True, inflation_rate=0.06)
+    executor = Executor(kind, workers)
+    assert simulate_multiple_runs(p, 20000, seed=3, chunk_size=5000, executor=executor).equals(
+        simulate_multiple_runs(p, 20000, seed=3, chunk_size=5000))
+    assert compare_strategies(p, list('ABCDEF'), executor=executor).equals(compare_strategies(p, list('ABCDEF')))
+    assert optimize_investment_split(dict(p, strategy='C'), step=10, executor=executor).equals(
+        optimize_investment_split(dict(p, strategy='C'), step=10))
+    parallel = run_monte_carlo(p, 20000, seed=3, chunk_size=5000, executor=executor)
+    serial = run_monte_carlo(p, 20000, seed=3, chunk_size=5000)
+    assert parallel.describe().equals(serial.describe())
+
+
+def test_map_keeps_input_order():
+    executor = Executor("thread", 4, chunk_size=3)
+    assert executor.map(lambda x: x * x, range(50)) == [x * x for x in range(50)]
+    assert chunked(list(range(7)), 3) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_get_executor(monkeypatch):
+    monkeypatch.setenv("SIM_EXECUTOR", "thread")
+    monkeypatch.setenv("SIM_WORKERS", "3")
+    assert (get_executor().kind, get_executor().workers) == ("thread", 3)
+    assert get_executor("serial").workers == 1
+    with pytest.raises(ValueError):
+        Executor("gpu")
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+import instrumentation
+from cache import ResultCache
+from jobs import JobManager, submit_monte_carlo, submit_optimization
+from montecarlo import run_monte_carlo
+from test_equivalence import BASE
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(workers=2)
+    yield manager
+    manager.shutdown()
+
+
+def blocking_job(started, release):
+    # Reports progress until release is set, so cancellation can land mid-run
+    def work(job):
+        job.report(0.5, "partial")
+        started.set()
+        while not release.wait(0.01):
+            job.report(0.5, "partial")
+        return "result"
+    return work
+
+
+def test_identical_requests_share_one_job(manager):
+    started, release = threading.Event(), threading.Event()
+    a = manager.submit("key", blocking_job(started, release))
+    b = manager.submit("key", blocking_job(started, release))
+    assert a is b and a.subscribers == 2
+    started.wait(5)
+    manager.release(a)
+    assert not a.cancel_requested
+    release.set()
+    a.future.result(5)
+    assert (a.status, a.result, a.progress) == ("done", "result", 1.0)
+
+
+def test_last_release_cancels_and_resubmit_starts_fresh(manager):
+    started, release = threading.Event(), threading.Event()
+    a = manager.submit("key", blocking_job(started, release))
+    started.wait(5)
+    manager.release(a)
+    b = manager.submit("key", lambda job: "fresh")
+    a.future.result(5)
+    b.future.result(5)
+    assert (a.status, a.partial) == ("cancelled", "partial")
+    assert b is not a and b.result == "fresh"
+
+
+def test_queued_job_cancels_without_running(manager):
+    started, release = threading.Event(), threading.Event()
+    busy = [manager.submit(f"busy{i}", blocking_job(started, release)) for i in range(2)]
+    queued = manager.submit("queued", lambda job: pytest.fail("cancelled job ran"))
+    manager.release(queued)
+    release.set()
+    for job in busy:
+        job.future.result(5)
+    assert queued.status == "cancelled"
+
+
+def test_failures_and_diagnostics(manager):
+    def fail(job):
+        raise RuntimeError("boom")
+    job = manager.submit("fail", fail)
+    job.future.result(5)
+    assert job.status == "failed" and str(job.error) == "boom"
+    instrumentation.set_enabled(True)
+    try:
+        profiled = manager.submit("profiled", lambda job: 1)
+    finally:
+        instrumentation.set_enabled(False)
+    profiled.future.result(5)
+    assert 'job' in [entry['name'] for entry in profiled.diagnostics['spans']]
+
+
+def test_monte_carlo_job_matches_direct_run_and_caches(manager):
+    results = ResultCache()
+    p = dict(BASE, strategy='G')
+    job = submit_monte_carlo(p, runs=30000, seed=4, manager=manager, cache=results)
+    job.future.result(30)
+    assert job.status == "done"
+    assert job.result.describe().equals(run_monte_carlo(p, 30000, seed=4).describe())
+    assert job.partial.runs == 30000
+    again = submit_monte_carlo(p, runs=30000, seed=4, manager=manager, cache=results)
+    assert again.done and again.future is None and again.result.describe().equals(job.result.describe())
+
+
+def test_optimization_job_reports_curve(manager):
+    job = submit_optimization(dict(BASE, strategy='C'), step=20, manager=manager, cache=ResultCache())
+    job.future.result(30)
+    assert job.status == "done" and len(job.result) == 6
+    assert len(job.partial) == 6
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from montecarlo import FanChart, StreamingHistogram, StreamingStats, run_monte_carlo
+from simulation import simulate_multiple_runs
+from test_equivalence import BASE
+
+P = dict(BASE, years=5)
+
+
+def test_streaming_stats_match_numpy():
+    values = np.random.default_rng(0).lognormal(10, 1, 50_000)
+    stats = StreamingStats()
+    for chunk in np.array_split(values, 7):
+        stats.update(chunk)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_histogram_quantiles_within_one_bin():
+    rng = np.random.default_rng(1)
+    histogram = StreamingHistogram(2048)
+    values = []
+    for scale in (1, 10, 100):  # the range has to grow twice
+        chunk = rng.normal(0, scale, 20_000)
+        histogram.update(chunk)
+        values.append(chunk)
+    values = np.concatenate(values)
+    for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+        assert abs(histogram.quantile(q) - np.quantile(values, q)) <= histogram.width
+
+
+def test_histogram_drops_non_finite_values():
+    histogram = StreamingHistogram()
+    histogram.update([1.0, 2.0])
+    histogram.update([np.inf, -np.inf, np.nan, 3.0])
+    assert histogram.dropped == 3
+    assert histogram.counts.sum() == 3
+    histogram = StreamingHistogram()
+    histogram.update([np.inf])
+    assert histogram.counts.sum() == 0 and np.isnan(histogram.quantile(0.5))
+
+
+def test_fan_chart_skips_padding():
+    fan = FanChart(3, bins=64)
+    fan.update(np.array([[1.0, 2.0], [3.0, np.nan], [np.nan, np.nan]]))
+    bands = fan.bands()
+    assert list(fan.counts) == [2, 1, 0]
+    assert bands['Mean'].iloc[1] == 3.0 and np.isnan(bands['P50'].iloc[2])
+
+
+def _same(a, b):
+    assert a.runs == b.runs
+    assert a.describe().equals(b.describe())
+    np.testing.assert_array_equal(a.histogram.counts, b.histogram.counts)
+
+
+def test_seed_fixes_results_across_chunk_sizes():
+    reference = run_monte_carlo(P, 45_000, seed=7)
+    for chunk_size in (1, 10_000, 20_000, 30_000):
+        _same(run_monte_carlo(P, 45_000, seed=7, chunk_size=chunk_size), reference)
+    runs = simulate_multiple_runs(P, 45_000, seed=7, chunk_size=20_000)['Final Net Worth (INR)']
+    np.testing.assert_array_equal(runs, simulate_multiple_runs(P, 45_000, seed=7)['Final Net Worth (INR)'])
+    assert runs.mean() == pytest.approx(reference.stats.mean, rel=1e-12)
+
+
+def test_fan_chart_does_not_change_results():
+    plain = run_monte_carlo(P, 45_000, seed=7)
+    with_fan = run_monte_carlo(P, 45_000, seed=7, fan_chart=True)
+    _same(with_fan, plain)
+    assert with_fan.fan is not None
+
+
+def test_early_stop_does_not_depend_on_chunk_size():
+    a = run_monte_carlo(P, 200_000, seed=3, rtol=0.005, chunk_size=10_000)
+    b = run_monte_carlo(P, 200_000, seed=3, rtol=0.005)
+    assert a.converged and a.runs < 200_000
+    _same(a, b)
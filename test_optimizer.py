@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from optimizer import EvaluationCache, golden_section_search, maximize_1d, optimize_parameters, optimize_split
+from simulation import optimize_investment_split, simulate_summary
+from test_equivalence import BASE, random_params
+
+
+def test_golden_section_finds_peak():
+    x, fx = golden_section_search(lambda x: -(x - 37.3) ** 2, 0, 100, tol=1e-6)
+    assert x == pytest.approx(37.3, abs=1e-5)
+    assert fx == pytest.approx(0, abs=1e-9)
+
+
+def test_grid_brackets_higher_peak():
+    # Two humps: the grid brackets the higher one, golden section refines it
+    f = lambda x: max(10 - abs(x - 20), 12 - 0.5 * abs(x - 83))
+    x, fx = maximize_1d(f, 0, 100, step=10, tol=1e-4)
+    assert x == pytest.approx(83, abs=1e-3)
+    assert fx == pytest.approx(12, abs=1e-2)
+
+
+def test_golden_split_matches_full_grid():
+    rs = random.Random(4)
+    for _ in range(40):
+        p = random_params(rs, 'BC')
+        grid = max(simulate_summary(dict(p, percent_to_invest=pct))['final_net_worth'] for pct in range(101))
+        curve = optimize_investment_split(p, step=10, method="golden", tol=0.01)
+        assert curve["Final Net Worth"].max() >= grid - 1e-6 * max(abs(grid), 1), p
+        assert len(curve) < 101
+
+
+def test_coordinate_ascent_beats_start_and_reuses_points():
+    p = dict(BASE, strategy='C', percent_to_invest=10, moratorium_invest_pct=0)
+    result = optimize_parameters(p, step=20, tol=0.5)
+    assert result['final_net_worth'] >= simulate_summary(p)['final_net_worth']
+    assert set(result['best']) == {'percent_to_invest', 'moratorium_invest_pct'}
+    assert result['cache_hits'] > 0
+    assert result['evaluations'] == len(result['trace'])
+    with pytest.raises(ValueError):
+        optimize_parameters(dict(BASE, strategy='A'))
+
+
+def test_evaluation_cache_and_progress():
+    seen = []
+    evaluate = EvaluationCache(BASE, on_evaluation=lambda cache: seen.append(cache.evaluations))
+    assert evaluate(percent_to_invest=30) == evaluate(percent_to_invest=30.0000001)
+    assert (evaluate.evaluations, evaluate.hits, seen) == (1, 1, [1])
+    curves = []
+    optimize_split(BASE, step=25, on_point=curves.append)
+    assert [len(curve) for curve in curves] == list(range(1, len(curves) + 1))
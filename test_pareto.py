@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from pareto import non_dominated_sort, pareto_frontier, pareto_strategies
+from simulation import simulate_strategy
+from test_equivalence import BASE
+
+
+def peel_fronts(values):
+    # Reference: repeatedly remove the rows no remaining row dominates
+    ranks = np.full(len(values), -1)
+    remaining = np.arange(len(values))
+    rank = 0
+    while len(remaining):
+        block = values[remaining]
+        dominated = [((block <= row).all(axis=1) & (block < row).any(axis=1)).any() for row in block]
+        ranks[remaining[~np.array(dominated)]] = rank
+        remaining = remaining[np.array(dominated)]
+        rank += 1
+    return ranks
+
+
+@pytest.mark.parametrize("objectives", [1, 2, 3, 4, 5])
+def test_matches_brute_force(objectives):
+    rs = np.random.default_rng(objectives)
+    for size in [0, 1, 2, 10, 300]:
+        # Few distinct values, so ties and duplicate rows are common
+        values = rs.integers(0, 6, size=(size, objectives)).astype(float)
+        if size > 5:
+            values[rs.integers(0, size, 5), 0] = np.inf
+        np.testing.assert_array_equal(non_dominated_sort(values), peel_fronts(values))
+        continuous = rs.normal(size=(size, objectives))
+        np.testing.assert_array_equal(non_dominated_sort(continuous), peel_fronts(continuous))
+
+
+def test_maximize_flags_and_shape():
+    values = np.array([[1.0, 5.0], [2.0, 4.0], [0.0, 6.0], [2.0, 6.0]])
+    np.testing.assert_array_equal(non_dominated_sort(values, maximize=[True, False]),
+                                  peel_fronts(values * [-1, 1]))
+    with pytest.raises(ValueError):
+        non_dominated_sort(np.zeros(4))
+
+
+def test_frontier_objectives_match_simulator():
+    frontier = pareto_frontier(BASE, step=25, job_loss_starts=[12, 36])
+    assert set(frontier['Strategy']) == set(pareto_strategies())
+    assert (frontier['Rank'] == 0).any()
+    row = frontier[(frontier['Strategy'] == 'B') & (frontier['Investment %'] == 75)].iloc[0]
+    assert row['Final Net Worth'] == simulate_strategy(dict(BASE, percent_to_invest=75)).summary['final_net_worth']
+    worst = min(simulate_strategy(dict(BASE, percent_to_invest=75, enable_job_loss=True, job_loss_start=start,
+                                       job_loss_duration=6, income_recovery_rate=50)).summary['final_net_worth']
+                for start in [12, 36])
+    assert row['Worst-Case Net Worth'] == pytest.approx(worst, rel=1e-12)
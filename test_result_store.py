@@ -0,0 +1,64 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from result_store import ResultStore
+from simulation import simulate_batch, simulate_strategy
+from test_equivalence import BASE
+
+
+def _rows():
+    return [dict(BASE, strategy=code, years=years) for code, years in [('A', 1), ('C', 2), ('E', 2)]]
+
+
+def test_float32_subset_store_matches_full_store():
+    _, full = simulate_batch(_rows(), paths=True)
+    store = ResultStore(3, 24, ['Net Worth'], np.float32)
+    simulate_batch(_rows(), paths=store)
+    np.testing.assert_array_equal(store['Net Worth'], full['Net Worth'].astype(np.float32))
+    assert np.isnan(store['Net Worth'][0, 12:]).all()
+
+
+def test_from_result_round_trips():
+    result = simulate_strategy(dict(BASE, strategy='B'))
+    frame = ResultStore.from_result(result).to_frame()
+    assert frame.index[0] == 1 and len(frame) == BASE['years'] * 12
+    for name, values in result.columns.items():
+        np.testing.assert_array_equal(frame[name].to_numpy(), values)
+
+
+def test_npy_round_trip(tmp_path):
+    store = ResultStore(3, 24, ['Net Worth', 'Loan Balance'], np.float32, directory=tmp_path / "store",
+                        labels={'strategy': np.array(['A', 'C', 'E'])})
+    simulate_batch(_rows(), paths=store)
+    store.flush()
+    reopened = ResultStore.open(tmp_path / "store")
+    np.testing.assert_array_equal(reopened['Net Worth'], store['Net Worth'])
+    assert list(reopened.horizons) == [12, 24, 24]
+    assert list(reopened.labels['strategy']) == ['A', 'C', 'E']
+
+
+def test_csv_export_skips_padding():
+    store = ResultStore(3, 24, ['Net Worth'], labels={'strategy': np.array(['A', 'C', 'E'])})
+    simulate_batch(_rows(), paths=store)
+    frame = pd.read_csv(io.BytesIO(store.to_csv(io.BytesIO(), chunk_rows=10).getvalue()))
+    assert list(frame.columns) == ['strategy', 'Month', 'Net Worth']
+    assert len(frame) == 12 + 24 + 24
+    assert not frame['Net Worth'].isna().any()
+    assert frame.groupby('strategy')['Month'].max().to_dict() == {'A': 12, 'C': 24, 'E': 24}
+    headless = store.to_csv(io.BytesIO(), header=False).getvalue()
+    assert headless.count(b"\n") == len(frame)
+
+
+def test_parquet_export_matches_csv():
+    pytest.importorskip("pyarrow")
+    store = ResultStore(3, 24, ['Net Worth'])
+    simulate_batch(_rows(), paths=store)
+    buffer = io.BytesIO()
+    store.to_parquet(buffer, chunk_rows=10)
+    parquet = pd.read_parquet(io.BytesIO(buffer.getvalue()))
+    csv = pd.read_csv(io.BytesIO(store.to_csv(io.BytesIO()).getvalue()))
+    np.testing.assert_allclose(parquet['Net Worth'], csv['Net Worth'])
+    assert list(parquet['Path'].unique()) == [0, 1, 2]
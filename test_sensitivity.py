@@ -0,0 +1,34 @@
+import numpy as np
+
+from sensitivity import grid_values, sensitivity_grid, sensitivity_parameters
+from test_equivalence import BASE
+
+
+def test_grid_values_stay_in_range():
+    assert grid_values('moratorium_invest_pct', 100, 1.0).max() == 100
+    assert grid_values('us_tax_rate', 0.9, 0.5).max() == 1
+    assert grid_values('loan_amount_inr', 1_000_000, 2.0).min() == 0
+    assert grid_values('fx_drift_rate', -0.03, 2.0).min() < -0.03 - 0.05
+
+
+def test_grid_values_from_zero_use_the_key_range():
+    assert grid_values('emi_inr', 0, 0.5).max() == 50_000
+    assert grid_values('percent_to_invest', 0, 0.5).max() == 100
+    months = grid_values('moratorium_months', 0, 0.5)
+    assert months.min() == 0 and months.max() == 24
+
+
+def test_grid_values_whole_months():
+    values = grid_values('years', 2, 1.0)
+    assert values.min() == 1 and np.array_equal(values, np.round(values))
+
+
+def test_inert_inputs_are_left_out():
+    keys = sensitivity_parameters(BASE)
+    assert 'loan_term_months' not in keys and 'indian_tax_rate' not in keys
+    assert 'percent_to_invest' in keys
+
+
+def test_grid_shape():
+    grid = sensitivity_grid(BASE, 'percent_to_invest', [0, 50, 100], 'years', [5, 10])
+    assert grid.shape == (2, 3) and not grid.isna().any().any()
@@ -0,0 +1,101 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from service import SimulationServer, SimulationService, validate_params
+from simulation import simulate_strategy
+from test_equivalence import BASE
+
+REQUEST = {key: BASE[key] for key in [
+    'years', 'gross_annual_salary_usd', 'us_tax_rate', 'monthly_expenses_usd', 'loan_amount_inr',
+    'interest_rate_loan', 'emi_inr', 'investment_rate_annual', 'usd_to_inr_rate', 'moratorium_months',
+    'percent_to_invest', 'strategy']}
+
+
+@pytest.fixture
+def service():
+    service = SimulationService(workers=2, max_pending=2, max_wait=0.05)
+    yield service
+    service.close()
+
+
+def test_validation_lists_every_problem(service):
+    status, payload = service.dispatch('POST', '/simulate', {'params': dict(
+        REQUEST, years=10.5, us_tax_rate=2, strategy='Q', foo=1, enable_job_loss="yes", emi_inr=None)})
+    assert status == 400
+    assert sorted(payload['details']) == sorted([
+        "unknown fields: foo", "missing emi_inr", "us_tax_rate above 1", "years must be a whole number",
+        "enable_job_loss must be true or false",
+        "unknown strategy 'Q', registered: ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']"])
+    assert service.dispatch('POST', '/simulate', {'params': dict(REQUEST, years=51)})[0] == 400
+    assert service.dispatch('POST', '/simulate', [])[0] == 400
+    status, payload = service.dispatch('POST', '/montecarlo', {'params': REQUEST, 'market': {
+        'kind': 'lognormal', 'return_vol': -1}})
+    assert (status, payload['details']) == (400, ["market return_vol must not be negative"])
+    assert service.dispatch('GET', '/nope')[0] == 404
+    assert service.dispatch('GET', '/simulate')[0] == 405
+
+
+def test_summaries_match_simulator(service):
+    for strategy in "ABCDEFGH":
+        for job_loss in (False, True):
+            request = dict(REQUEST, strategy=strategy, seed=3, enable_job_loss=job_loss)
+            status, payload = service.dispatch('POST', '/simulate', {'params': request})
+            assert status == 200
+            expected = simulate_strategy(validate_params(request)).summary
+            for field, value in expected.items():
+                assert payload['summary'][field] == pytest.approx(value, rel=1e-9), (strategy, field)
+    status, payload = service.dispatch('POST', '/simulate', {'params': REQUEST, 'monthly': True})
+    assert len(payload['monthly']['Net Worth']) == REQUEST['years'] * 12
+
+
+def test_concurrent_requests_are_batched(service):
+    requests = [dict(REQUEST, strategy="ABCDEF"[i % 6], percent_to_invest=i, enable_inflation=True)
+                for i in range(60)]
+    responses = [None] * len(requests)
+
+    def call(i):
+        responses[i] = service.dispatch('POST', '/simulate', {'params': requests[i]})
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for request, (status, payload) in zip(requests, responses):
+        assert status == 200
+        expected = simulate_strategy(validate_params(request)).summary['final_net_worth']
+        assert payload['summary']['final_net_worth'] == pytest.approx(expected, rel=1e-9)
+    batching = service.dispatch('GET', '/metrics')[1]['batching']
+    assert batching['rows'] == 60 and batching['batches'] < 60
+
+
+def test_busy_workers_give_503(service):
+    release = threading.Event()
+    blocked = [service._offload(release.wait) for _ in range(4)]
+    status, payload = service.dispatch('POST', '/montecarlo', {'params': REQUEST, 'runs': 10, 'seed': 1})
+    release.set()
+    for future in blocked:
+        future.result(5)
+    assert status == 503
+    assert service.dispatch('GET', '/metrics')[1]['endpoints']['/montecarlo']['rejected'] == 1
+
+
+def test_http_round_trip(service):
+    server = SimulationServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection(*server.server_address)
+        connection.request('POST', '/montecarlo', json.dumps({'params': REQUEST, 'runs': 2000, 'seed': 5}))
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+        assert response.status == 200 and payload['runs'] == 2000
+        connection.request('POST', '/simulate', b"{bad")
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 400
+    finally:
+        server.shutdown()
+        server.server_close()